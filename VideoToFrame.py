@@ -1,10 +1,20 @@
-import shutil, subprocess, math, threading
+import threading, math, os, time
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
+from frame_engine import (DEFAULT_OUTDIR, PROGRESS_INTERVAL, CUT_MODES, SUPPORTED_FORMATS, QUALITY_FORMATS, SAMPLE_MODES, PROFILES, DEDUP_MODES, SINKS,
+                          SAMPLE_DEFAULTS, JobController, have, ffprobe_duration_seconds, seconds_to_hhmmss_ms,
+                          hhmmss_ms_to_seconds, extract_frames, sample_value, estimate_frames, parse_output_spec, make_previews,
+                          FrameCache, DEDUP_THRESHOLD, DHASH_BITS, parse_ranges, load_ranges, extract_ranges, ffprobe_video_stream,
+                          ffprobe_timecode)
+from job_queue import JobQueue
+
 APP_TITLE = "VideoToFrame"
-DEFAULT_OUTDIR = "frames_out"
+LOG_MAX_LINES = 5000      # líneas máximas en el widget de log
+FRAME_PREVIEW_WIDTH = 240 # ancho de los frames de vista previa de los sliders
+FRAME_KEY_MS = 100        # slider quieto este tiempo → keyframe más cercano (rápido)
+FRAME_EXACT_MS = 400      # ... y este otro → frame exacto
 
 # ASCII Art Banner
 BANNER_ASCII = """
@@ -17,52 +27,6 @@ BANNER_ASCII = """
    ░███    ░██ ░█████░██  ░███████   ░███████      ░██     ░███████  ░██        ░██       ░█████░██ ░██   ░██   ░██  ░███████  
 """
 
-def have(bin_name: str) -> bool:
-    return shutil.which(bin_name) is not None
-
-def run_ffmpeg(cmd: list[str]) -> tuple[int, str]:
-    try:
-        p = subprocess.run(cmd, capture_output=True, text=True)
-        return p.returncode, (p.stdout or "") + (p.stderr or "")
-    except Exception as e:
-        return 1, f"ERROR ejecutando FFmpeg: {e}"
-
-def ffprobe_duration_seconds(path: Path) -> float | None:
-    try:
-        out = subprocess.check_output(
-            ["ffprobe","-v","error","-show_entries","format=duration","-of","default=noprint_wrappers=1:nokey=1", str(path)],
-            text=True
-        ).strip()
-        return float(out) if out else None
-    except Exception:
-        return None
-
-def seconds_to_hhmmss_ms(sec: float) -> str:
-    if sec < 0: sec = 0.0
-    ms = int(round(sec * 1000))
-    h = ms // 3_600_000
-    ms %= 3_600_000
-    m = ms // 60_000
-    ms %= 60_000
-    s = ms // 1000
-    ms %= 1000
-    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
-
-def hhmmss_ms_to_seconds(txt: str) -> float:
-    t = txt.strip()
-    if not t: return 0.0
-    if ":" not in t:
-        return float(t)  # segundos como "12.5"
-    # HH:MM:SS.mmm
-    hh, mm, ss = t.split(":")
-    if "." in ss:
-        ss_i, ms = ss.split(".")
-        ms = ms.ljust(3, "0")[:3]
-        total = int(hh)*3600 + int(mm)*60 + int(ss_i) + int(ms)/1000.0
-    else:
-        total = int(hh)*3600 + int(mm)*60 + int(ss)
-    return float(total)
-
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -80,11 +44,36 @@ class App(tk.Tk):
         self.var_imgfmt  = tk.StringVar(value="png")
         self.var_q       = tk.StringVar(value="2")
         self.var_use_pts = tk.BooleanVar(value=False)
+        self.var_fast_seek = tk.BooleanVar(value=True)
+        self.var_workers = tk.StringVar(value="1")
+        self.var_profile = tk.StringVar(value="equilibrado")
         self.var_do_cut  = tk.BooleanVar(value=False)
         self.var_cutfile = tk.StringVar(value=str(Path("recorte.mp4").resolve()))
+        self.var_cut_mode = tk.StringVar(value="exacto")
+        self.var_sample  = tk.StringVar(value="todos")
+        self.var_sample_value = tk.StringVar(value="")
+        self.var_also    = tk.StringVar(value="")
+        self.var_dedup   = tk.StringVar(value="no")
+        self.var_sink    = tk.StringVar(value="carpeta")
+        self.var_ranges  = tk.StringVar(value="")
+        self.var_dedup_threshold = tk.StringVar(value=str(DEDUP_THRESHOLD))
+        self.var_preview_count = tk.StringVar(value="20")
+        self.var_preview_width = tk.StringVar(value="320")
+        self.var_preview_sheet = tk.BooleanVar(value=True)
         self.video_seconds = 0.0
         self.extracting = False  # Flag para rastrear si hay una extracción en progreso
-        self.current_process = None  # Referencia al proceso actual (si es necesario cancelarlo)
+        self.current_job = None  # JobController del trabajo en curso (procesos FFmpeg vivos, para cancelar)
+        self.var_keep_partial = tk.BooleanVar(value=False)
+        self.queue = None  # JobQueue, se abre al usarla por primera vez
+        self._log_buf = []  # log de los threads de trabajo, se vuelca en lotes
+        self._log_lock = threading.Lock()
+        self._log_flush_pending = False
+        self.frame_cache = FrameCache()  # frames de vista previa ya decodificados (LRU)
+        self._frame_after = {}  # "start"/"end" -> after() pendientes (debounce)
+        self._frame_want = {}   # "start"/"end" -> última petición (video, ms, exacto)
+        self._frame_imgs = {}   # PhotoImage mostradas (Tk las libera si no se guarda referencia)
+        self._frame_lock = threading.Lock()
+        self._frame_busy = False
 
         # Main container
         main_container = ttk.Frame(self, style="Card.TFrame")
@@ -129,6 +118,13 @@ class App(tk.Tk):
         self.sld_end.grid(row=r, column=3, columnspan=3, sticky="ew", padx=(8,0))
         r+=1
 
+        # Vista previa del frame en la posición de cada slider
+        self.lbl_frame = {}
+        for col, side in ((0, "start"), (3, "end")):
+            self.lbl_frame[side] = ttk.Label(frm, text="", style="Hint.TLabel", compound="top", anchor="center")
+            self.lbl_frame[side].grid(row=r, column=col, columnspan=3, pady=(4,8))
+        r+=1
+
         # Campos de tiempo (sincronizados)
         ttk.Label(frm, text="Inicio").grid(row=r, column=0, sticky="w")
         e_start = ttk.Entry(frm, width=16, textvariable=self.var_start)
@@ -146,6 +142,14 @@ class App(tk.Tk):
         e_dur.bind("<FocusOut>", lambda _e: self.sync_from_entries())
         r+=1
 
+        # Varios rangos (sustituyen a Inicio/Final si se rellenan)
+        ttk.Label(frm, text="Varios rangos").grid(row=r, column=0, sticky="w")
+        ttk.Entry(frm, textvariable=self.var_ranges).grid(row=r, column=1, columnspan=4, sticky="ew", padx=8)
+        ttk.Button(frm, text="Cargar CSV/EDL…", command=self.pick_ranges).grid(row=r, column=5, sticky="e")
+        r+=1
+        ttk.Label(frm, text="p. ej. intro=0-5, 00:01:00-00:01:05 · vacío = usar Inicio/Final · cada rango va a su subcarpeta; Workers = rangos a la vez", style="Hint.TLabel").grid(row=r, column=0, columnspan=6, sticky="w", pady=(0,8))
+        r+=1
+
         # Salida y formato
         ttk.Label(frm, text="Carpeta de frames").grid(row=r, column=0, sticky="w")
         ttk.Entry(frm, textvariable=self.var_outdir).grid(row=r, column=1, columnspan=4, sticky="ew", padx=8)
@@ -175,7 +179,64 @@ class App(tk.Tk):
         self.btn_cutfile.grid(row=r, column=5, sticky="e")
         r+=1
 
+        ttk.Label(frm, text="Modo de recorte").grid(row=r, column=0, sticky="w")
+        self.combo_cut_mode = ttk.Combobox(frm, width=10, state="disabled", values=list(CUT_MODES), textvariable=self.var_cut_mode)
+        self.combo_cut_mode.grid(row=r, column=1, sticky="w")
+        ttk.Label(frm, text="exacto: recodifica todo · rápido: copia los GOP completos y recodifica solo los extremos", style="Hint.TLabel").grid(row=r, column=2, columnspan=4, sticky="w")
+        r+=1
+
         ttk.Checkbutton(frm, text="Usar PTS en nombre de archivos (timestamps reales)", variable=self.var_use_pts).grid(row=r, column=0, columnspan=3, sticky="w")
+        ttk.Checkbutton(frm, text="Seek rápido por keyframes (mismo resultado)", variable=self.var_fast_seek).grid(row=r, column=3, columnspan=3, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Workers (paralelo)").grid(row=r, column=0, sticky="w")
+        ttk.Spinbox(frm, from_=1, to=os.cpu_count() or 1, width=6, textvariable=self.var_workers).grid(row=r, column=1, sticky="w")
+        ttk.Label(frm, text="Divide el rango en segmentos por keyframe (1 = un solo proceso)", style="Hint.TLabel").grid(row=r, column=2, columnspan=4, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Perfil").grid(row=r, column=0, sticky="w")
+        ttk.Combobox(frm, width=12, state="readonly", values=list(PROFILES) + ["auto"], textvariable=self.var_profile).grid(row=r, column=1, sticky="w")
+        ttk.Label(frm, text="rápido: menos compresión · compacto: archivos más pequeños · auto: mide esta máquina (una vez)", style="Hint.TLabel").grid(row=r, column=2, columnspan=4, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Muestreo").grid(row=r, column=0, sticky="w")
+        sample_combo = ttk.Combobox(frm, width=10, state="readonly", values=list(SAMPLE_MODES), textvariable=self.var_sample)
+        sample_combo.grid(row=r, column=1, sticky="w")
+        sample_combo.bind("<<ComboboxSelected>>", self._on_sample_changed)
+        ttk.Label(frm, text="Valor (N / fps / umbral)", style="Hint.TLabel").grid(row=r, column=2, sticky="w")
+        self.sample_entry = ttk.Entry(frm, width=8, textvariable=self.var_sample_value, state="disabled")
+        self.sample_entry.grid(row=r, column=3, sticky="w")
+        self.sample_entry.bind("<FocusOut>", lambda _e: self._update_estimate())
+        self.lbl_estimate = ttk.Label(frm, text="", style="Hint.TLabel")
+        self.lbl_estimate.grid(row=r, column=4, columnspan=2, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Salidas extra").grid(row=r, column=0, sticky="w")
+        ttk.Entry(frm, textvariable=self.var_also).grid(row=r, column=1, columnspan=2, sticky="ew")
+        ttk.Label(frm, text="p. ej. jpg:5@320, webp@50% · misma decodificación, subcarpeta por formato", style="Hint.TLabel").grid(row=r, column=3, columnspan=3, sticky="w", padx=(8,0))
+        r+=1
+
+        ttk.Label(frm, text="Guardar en").grid(row=r, column=0, sticky="w")
+        ttk.Combobox(frm, width=12, state="readonly", values=SINKS, textvariable=self.var_sink).grid(row=r, column=1, sticky="w")
+        ttk.Label(frm, text="carpeta: un archivo por frame · tar/zip/pack: todos en <prefijo>.tar/.zip/.vtfpack (png, jpg, bmp, webp)", style="Hint.TLabel").grid(row=r, column=2, columnspan=4, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Sin repetidos").grid(row=r, column=0, sticky="w")
+        ttk.Combobox(frm, width=12, state="readonly", values=DEDUP_MODES, textvariable=self.var_dedup).grid(row=r, column=1, sticky="w")
+        ttk.Label(frm, text="Umbral phash (bits)", style="Hint.TLabel").grid(row=r, column=2, sticky="w")
+        ttk.Entry(frm, width=8, textvariable=self.var_dedup_threshold).grid(row=r, column=3, sticky="w")
+        ttk.Label(frm, text="índice <prefijo>_index.tsv junto a los frames", style="Hint.TLabel").grid(row=r, column=4, columnspan=2, sticky="w")
+        r+=1
+
+        ttk.Label(frm, text="Vista previa").grid(row=r, column=0, sticky="w")
+        pv = ttk.Frame(frm, style="Card.TFrame"); pv.grid(row=r, column=1, columnspan=5, sticky="ew")
+        ttk.Spinbox(pv, from_=1, to=500, width=6, textvariable=self.var_preview_count).pack(side="left")
+        ttk.Label(pv, text="miniaturas de", style="Hint.TLabel").pack(side="left", padx=(6,6))
+        ttk.Entry(pv, width=6, textvariable=self.var_preview_width).pack(side="left")
+        ttk.Label(pv, text="px", style="Hint.TLabel").pack(side="left", padx=(6,12))
+        ttk.Checkbutton(pv, text="Hoja de contactos (5 columnas)", variable=self.var_preview_sheet).pack(side="left")
+        self.btn_preview = ttk.Button(pv, text="Generar vista previa", command=self.on_preview)
+        self.btn_preview.pack(side="right")
         r+=1
 
         for c in range(0,6): frm.grid_columnconfigure(c, weight=1 if c in (1,2,3) else 0)
@@ -183,9 +244,21 @@ class App(tk.Tk):
         btns = ttk.Frame(frm, style="Card.TFrame"); btns.grid(row=r, column=0, columnspan=6, sticky="ew", pady=(10,6))
         self.btn_extract = ttk.Button(btns, text="Extraer frames", command=self.on_extract, style="Accent.TButton")
         self.btn_extract.pack(side="left")
+        self.btn_cancel = ttk.Button(btns, text="Cancelar", command=self.on_cancel, state="disabled")
+        self.btn_cancel.pack(side="left", padx=(8,0))
+        ttk.Checkbutton(btns, text="Conservar salida parcial al cancelar", variable=self.var_keep_partial).pack(side="left", padx=(12,0))
+        self.btn_drain = ttk.Button(btns, text="Procesar cola", command=self.on_drain)
+        self.btn_drain.pack(side="right", padx=(8,0))
+        ttk.Button(btns, text="Añadir a la cola", command=self.on_enqueue).pack(side="right", padx=(8,0))
         ttk.Button(btns, text="Limpiar log", command=self.clear_log).pack(side="right")
         r+=1
 
+        self.progress = ttk.Progressbar(frm, mode="determinate", maximum=100)
+        self.progress.grid(row=r, column=0, columnspan=3, sticky="ew", pady=(0,6))
+        self.lbl_progress = ttk.Label(frm, text="", style="Hint.TLabel")
+        self.lbl_progress.grid(row=r, column=3, columnspan=3, sticky="w", padx=(8,0), pady=(0,6))
+        r+=1
+
         ttk.Label(frm, text="Log", style="Bold.TLabel").grid(row=r, column=0, sticky="w")
         self.txt = tk.Text(frm, height=12, wrap="word", bg="#0a0f14", fg="#00d4ff", 
                           insertbackground="#00d4ff", font=("Consolas", 9),
@@ -249,8 +322,10 @@ class App(tk.Tk):
         if ms >= end_ms:
             end_ms = ms + 10
             self.sld_end.set(end_ms)
+            self._schedule_frame("end")
         self.var_start.set(seconds_to_hhmmss_ms(ms/1000.0))
         self._update_duration_from_bounds()
+        self._schedule_frame("start")
 
     def on_slide_end(self, _val):
         ms = int(float(self.sld_end.get()))
@@ -258,8 +333,10 @@ class App(tk.Tk):
         if ms <= start_ms:
             start_ms = ms - 10 if ms >= 10 else 0
             self.sld_start.set(start_ms)
+            self._schedule_frame("start")
         self.var_end.set(seconds_to_hhmmss_ms(ms/1000.0))
         self._update_duration_from_bounds()
+        self._schedule_frame("end")
 
     def sync_from_entries(self):
         try:
@@ -279,6 +356,7 @@ class App(tk.Tk):
             self.var_start.set(seconds_to_hhmmss_ms(s_ms/1000))
             self.var_end.set(seconds_to_hhmmss_ms(e_ms/1000))
             self._update_duration_from_bounds()
+            self._schedule_frame("start"); self._schedule_frame("end")
         except Exception:
             pass
 
@@ -287,6 +365,71 @@ class App(tk.Tk):
         e_ms = int(float(self.sld_end.get()))
         dur = max(0, (e_ms - s_ms)/1000.0)
         self.var_duration.set(seconds_to_hhmmss_ms(dur))
+        self._update_estimate()
+
+    # === Vista previa de frames en los sliders ===
+    def _schedule_frame(self, side: str):
+        """Debounce: mientras se arrastra no se decodifica nada; con el slider quieto se muestra primero
+        el keyframe anterior (un solo frame decodificado) y poco después el frame exacto"""
+        for after_id in self._frame_after.pop(side, ()): self.after_cancel(after_id)
+        self._frame_after[side] = (self.after(FRAME_KEY_MS, self._request_frame, side, False),
+                                   self.after(FRAME_EXACT_MS, self._request_frame, side, True))
+
+    def _request_frame(self, side: str, exact: bool):
+        inp = self.var_input.get().strip()
+        if not inp or self.video_seconds <= 0 or not have("ffmpeg"): return
+        ms = int(float((self.sld_start if side == "start" else self.sld_end).get()))
+        ms = min(ms, max(0, int(self.video_seconds * 1000) - 50))  # el instante final no tiene frame
+        with self._frame_lock:
+            self._frame_want[side] = (Path(inp), ms, exact)
+            if self._frame_busy: return
+            self._frame_busy = True
+        threading.Thread(target=self._frame_worker, daemon=True).start()
+
+    def _frame_worker(self):
+        """Decodifica solo la petición más reciente de cada slider; las intermedias se descartan"""
+        while True:
+            with self._frame_lock:
+                if not self._frame_want:
+                    self._frame_busy = False; return
+                side, (inp, ms, exact) = self._frame_want.popitem()
+            data = self.frame_cache.get(inp, ms * 1000, FRAME_PREVIEW_WIDTH, exact)
+            self.after(0, self._show_frame, side, ms, exact, data)
+
+    def _show_frame(self, side: str, ms: int, exact: bool, data: bytes | None):
+        caption = f"{'Inicio' if side == 'start' else 'Final'} · {seconds_to_hhmmss_ms(ms/1000)}" + ("" if exact else " (keyframe)")
+        if data is None:
+            self._frame_imgs.pop(side, None)
+            self.lbl_frame[side].config(image="", text=caption + " · sin frame"); return
+        try:
+            self._frame_imgs[side] = tk.PhotoImage(data=data, format="ppm")
+        except tk.TclError:
+            return
+        self.lbl_frame[side].config(image=self._frame_imgs[side], text=caption)
+
+    def _on_sample_changed(self, event=None):
+        """Habilita el campo de valor y pone el valor por defecto del modo elegido"""
+        mode = self.var_sample.get()
+        if mode in SAMPLE_DEFAULTS:
+            self.sample_entry.config(state="normal"); self.var_sample_value.set(f"{SAMPLE_DEFAULTS[mode]:g}")
+        else:
+            self.sample_entry.config(state="disabled"); self.var_sample_value.set("")
+        self._update_estimate()
+
+    def _update_estimate(self):
+        """Frames estimados del rango actual (los metadatos ya están en caché desde pick_input)"""
+        if self.video_seconds <= 0 or not self.var_input.get().strip():
+            self.lbl_estimate.config(text=""); return
+        mode = self.var_sample.get()
+        if mode == "keyframes":  # contarlos exige leer paquetes: se hace al iniciar
+            self.lbl_estimate.config(text="Frames: se cuentan al iniciar"); return
+        try:
+            val = sample_value(mode, float(self.var_sample_value.get()) if self.var_sample_value.get().strip() else None)
+        except ValueError:
+            self.lbl_estimate.config(text="Frames: –"); return
+        s_us = int(float(self.sld_start.get())) * 1000; e_us = int(float(self.sld_end.get())) * 1000
+        est = estimate_frames(Path(self.var_input.get().strip()), s_us, e_us, mode, val) if e_us > s_us else 0
+        self.lbl_estimate.config(text=f"Frames: ~{est}" if est is not None else "Frames: depende del contenido")
 
     # === Picks ===
     def pick_input(self):
@@ -300,7 +443,7 @@ class App(tk.Tk):
         if not p: return
         
         # Limpiar estado previo
-        self.current_process = None
+        self.current_job = None
         
         # Cargar nuevo video
         self.var_input.set(p)
@@ -332,6 +475,23 @@ class App(tk.Tk):
         self.var_end.set(seconds_to_hhmmss_ms(min(secs, 5.0)))
         self._update_duration_from_bounds()
         self.lbl_duration.config(text=f"Duración: {seconds_to_hhmmss_ms(secs)}")
+        self._schedule_frame("start"); self._schedule_frame("end")
+
+    def pick_ranges(self):
+        p = filedialog.askopenfilename(title="Cargar rangos", filetypes=[("CSV o EDL","*.csv *.edl *.txt"),("Todos","*.*")])
+        if not p: return
+        inp = self.var_input.get().strip()
+        fps = (ffprobe_video_stream(Path(inp)) or {}).get("fps") if inp and Path(inp).exists() else None
+        start_tc = ffprobe_timecode(Path(inp)) if fps else None  # los EDL van en el timecode del clip
+        try:
+            ranges = load_ranges(Path(p), fps, start_tc)
+        except (OSError, ValueError) as err:
+            messagebox.showerror("Rangos", str(err) if Path(p).suffix.lower() != ".edl" or fps else "Carga primero el video: el EDL necesita sus fps.")
+            return
+        self.var_ranges.set(", ".join((f"{r['name']}=" if r["name"] else "") + f"{seconds_to_hhmmss_ms(r['start_us']/1e6)}-{seconds_to_hhmmss_ms(r['end_us']/1e6)}"
+                                      for r in ranges))
+        self.log(f"[INFO] {len(ranges)} rangos cargados de {Path(p).name}"
+                 + (f" (timecode inicial del video {start_tc or '00:00:00:00'})" if Path(p).suffix.lower() == ".edl" else "") + "\n")
 
     def pick_outdir(self):
         p = filedialog.askdirectory(title="Seleccionar carpeta de salida")
@@ -346,27 +506,65 @@ class App(tk.Tk):
     def toggle_cut(self):
         st = "normal" if self.var_do_cut.get() else "disabled"
         self.entry_cut.configure(state=st); self.btn_cutfile.configure(state=st)
+        self.combo_cut_mode.configure(state="readonly" if self.var_do_cut.get() else "disabled")
 
     def log(self, text: str):
-        self.txt.insert("end", text); self.txt.see("end")
+        self.txt.insert("end", text)
+        # Limitar el tamaño del widget para que la memoria no crezca con trabajos largos
+        excess = int(self.txt.index("end-1c").split(".")[0]) - LOG_MAX_LINES
+        if excess > 0: self.txt.delete("1.0", f"{excess + 1}.0")
+        self.txt.see("end")
+
+    def post_log(self, text: str):
+        """Log desde threads de trabajo: acumula y vuelca en un solo insert cada PROGRESS_INTERVAL"""
+        with self._log_lock:
+            self._log_buf.append(text)
+            if self._log_flush_pending: return
+            self._log_flush_pending = True
+        self.after(int(PROGRESS_INTERVAL * 1000), self._flush_log)
+
+    def _flush_log(self):
+        with self._log_lock:
+            text = "".join(self._log_buf); self._log_buf.clear()
+            self._log_flush_pending = False
+        if text: self.log(text)
+
+    def _progress_callback(self, total_s: float):
+        """Callback de progreso para extract_frames: % y ETA de cada etapa respecto a la duración seleccionada"""
+        t0, current = time.monotonic(), [None]
+        def cb(stage: str, st: dict):
+            nonlocal t0
+            if stage != current[0]: t0, current[0] = time.monotonic(), stage
+            done = st.get("out_time") or 0.0
+            pct = min(100.0, 100.0 * done / total_s) if total_s > 0 else 0.0
+            elapsed = time.monotonic() - t0
+            eta = elapsed * (total_s - done) / done if done > 0 else None
+            parts = [f"{stage}: {pct:.0f}%"]
+            if st.get("frame") is not None: parts.append(f"frame {st['frame']}")
+            if st.get("fps"): parts.append(f"{st['fps']:.0f} fps")
+            if st.get("speed"): parts.append(f"{st['speed']:.2f}x")
+            parts.append(f"ETA {seconds_to_hhmmss_ms(eta)[:8]}" if eta is not None else "ETA –")
+            text = " · ".join(parts)
+            self.after(0, lambda: self._show_progress(pct, text))
+        return cb
+
+    def _show_progress(self, pct: float, text: str):
+        self.progress.configure(value=pct); self.lbl_progress.config(text=text)
 
     def clear_log(self):
         self.txt.delete("1.0", "end")
 
     # === Acción principal ===
-    def on_extract(self):
-        if self.extracting:
-            messagebox.showwarning("En progreso", "Ya hay una extracción en progreso. Por favor espera.")
-            return
-        
+    def _read_job(self):
+        """Valida el formulario y devuelve (inp, s, e, outdir, opts), o None si algo no es válido"""
         if not have("ffmpeg") or not have("ffprobe"):
             messagebox.showerror("Dependencias", "Se requieren ffmpeg y ffprobe en el PATH.")
-            return
+            return None
         
         inp = Path(self.var_input.get().strip())
         if not inp.exists():
             messagebox.showerror("Entrada", "Selecciona un archivo de video válido.")
-            return
+            return None
 
         # calcula tiempo desde sliders (preciso por ms)
         s_ms = int(float(self.sld_start.get())); e_ms = int(float(self.sld_end.get()))
@@ -375,89 +573,236 @@ class App(tk.Tk):
         outdir = Path(self.var_outdir.get().strip() or DEFAULT_OUTDIR); outdir.mkdir(parents=True, exist_ok=True)
         prefix = self.var_prefix.get().strip() or "frame"
         imgfmt = (self.var_imgfmt.get() or "png").lower()
-        # Formatos soportados
-        supported_formats = ["png", "jpg", "jpeg", "webp", "bmp", "tiff", "tif", "gif"]
-        if imgfmt not in supported_formats:
-            messagebox.showerror("Formato", f"Formato inválido. Formatos soportados: {', '.join(supported_formats)}")
-            return
+        if imgfmt not in SUPPORTED_FORMATS:
+            messagebox.showerror("Formato", f"Formato inválido. Formatos soportados: {', '.join(SUPPORTED_FORMATS)}")
+            return None
 
         # Validar calidad antes de iniciar thread
-        if imgfmt in ("jpg", "jpeg", "webp"):
+        q = 2
+        if imgfmt in QUALITY_FORMATS:
             try:
                 q = int((self.var_q.get() or "2").strip())
                 if not (2<=q<=31): raise ValueError()
             except ValueError:
                 messagebox.showerror("Calidad","Proporciona un entero entre 2 y 31.")
+                return None
+
+        try:
+            workers = int((self.var_workers.get() or "1").strip())
+            if workers < 1: raise ValueError()
+        except ValueError:
+            messagebox.showerror("Workers","Proporciona un entero mayor o igual a 1.")
+            return None
+
+        sample = self.var_sample.get()
+        try:
+            val = self.var_sample_value.get().strip()
+            sample_val = sample_value(sample, float(val) if val else None)
+        except ValueError as err:
+            messagebox.showerror("Muestreo", str(err) if str(err) else "Proporciona un número válido.")
+            return None
+
+        try:
+            outputs = [parse_output_spec(spec) for spec in self.var_also.get().split(",") if spec.strip()]
+        except ValueError as err:
+            messagebox.showerror("Salidas extra", str(err))
+            return None
+
+        dedup = self.var_dedup.get()
+        try:
+            dedup_threshold = int((self.var_dedup_threshold.get() or str(DEDUP_THRESHOLD)).strip())
+            if not 0 <= dedup_threshold <= DHASH_BITS: raise ValueError()
+        except ValueError:
+            messagebox.showerror("Sin repetidos", f"El umbral debe ser un entero entre 0 y {DHASH_BITS}.")
+            return None
+
+        # Las variables de Tk se leen aquí, en el hilo principal
+        opts = dict(prefix=prefix, imgfmt=imgfmt, quality=q, use_pts=self.var_use_pts.get(), fast_seek=self.var_fast_seek.get(),
+                    workers=workers, cut=Path(self.var_cutfile.get().strip() or "recorte.mp4") if self.var_do_cut.get() else None,
+                    cut_mode=self.var_cut_mode.get(), sample=sample, sample_val=sample_val, outputs=outputs,
+                    profile=self.var_profile.get(), dedup=dedup, dedup_threshold=dedup_threshold, sink=self.var_sink.get(),
+                    keep_partial=self.var_keep_partial.get())
+        return inp, s, e, outdir, opts
+
+    def on_extract(self):
+        if self.extracting:
+            messagebox.showwarning("En progreso", "Ya hay una extracción en progreso. Por favor espera.")
+            return
+        spec = self._read_job()
+        if spec is None: return
+        inp, s, e, outdir, opts = spec
+        ranges = None
+        if self.var_ranges.get().strip():
+            try:
+                ranges = parse_ranges(self.var_ranges.get())
+            except ValueError as err:
+                messagebox.showerror("Rangos", str(err))
                 return
 
         # Deshabilitar botón y marcar como extrayendo
         self.extracting = True
+        self.current_job = JobController()
         self.btn_extract.config(state="disabled", text="Extrayendo...")
+        self.btn_cancel.config(state="normal")
+        self._show_progress(0, "")
         
         # Ejecutar extracción en thread separado
-        thread = threading.Thread(target=self._extract_worker, args=(inp, s, e, outdir, prefix, imgfmt), daemon=True)
+        if ranges:
+            thread = threading.Thread(target=self._ranges_worker, args=(inp, ranges, outdir, opts, self.current_job), daemon=True)
+        else:
+            thread = threading.Thread(target=self._extract_worker, args=(inp, s, e, outdir, opts, self.current_job), daemon=True)
         thread.start()
 
-    def _extract_worker(self, inp: Path, s: str, e: str, outdir: Path, prefix: str, imgfmt: str):
+    def on_preview(self):
+        """Miniaturas (o una hoja de contactos) del rango en <carpeta>/preview: un keyframe por miniatura"""
+        if self.extracting:
+            messagebox.showwarning("En progreso", "Ya hay una extracción en progreso. Por favor espera.")
+            return
+        spec = self._read_job()
+        if spec is None: return
+        inp, s, e, outdir, _opts = spec
+        try:
+            count = int(self.var_preview_count.get().strip()); width = int(self.var_preview_width.get().strip())
+            if count < 1 or width < 16: raise ValueError()
+        except ValueError:
+            messagebox.showerror("Vista previa", "Miniaturas debe ser un entero ≥ 1 y el ancho un entero ≥ 16 px.")
+            return
+        sheet = self.var_preview_sheet.get()
+        self.extracting = True
+        self.current_job = JobController()
+        self.btn_extract.config(state="disabled")
+        self.btn_preview.config(state="disabled", text="Generando…")
+        self.btn_cancel.config(state="normal")
+        thread = threading.Thread(target=self._preview_worker, args=(inp, s, e, outdir / "preview", count, width, sheet, self.current_job), daemon=True)
+        thread.start()
+
+    def _preview_worker(self, inp: Path, s: str, e: str, outdir: Path, count: int, width: int, sheet: bool, job: JobController):
+        try:
+            res = make_previews(inp, s, e, outdir, count=count, width=width, sheet=sheet, cols=5,
+                                rows=math.ceil(count / 5), log=self.post_log, job=job)
+            if res["status"] == "ok":
+                self.after(0, lambda: messagebox.showinfo("✨ Vista previa", f"{len(res['files'])} imágenes en:\n{outdir.resolve()}"))
+            elif res["error"]:
+                self.post_log(f"[ERROR] {res['error']}\n")
+        except Exception as e:
+            self.post_log(f"[ERROR] Error inesperado: {e}\n")
+        finally:
+            self.after(0, self._extraction_done)
+
+    def _job_queue(self) -> JobQueue:
+        if self.queue is None: self.queue = JobQueue()
+        return self.queue
+
+    def on_enqueue(self):
+        """Guarda el trabajo del formulario en la cola persistente (se procesa con "Procesar cola")"""
+        spec = self._read_job()
+        if spec is None: return
+        inp, s, e, outdir, opts = spec
+        if opts["sample"] != "todos" or opts["outputs"] or opts["dedup"] != "no" or opts["sink"] != "carpeta" or self.var_ranges.get().strip():
+            messagebox.showerror("Cola", "La cola solo admite la extracción de todos los frames de un único rango en un formato a una carpeta (muestreo «todos», sin salidas extra, deduplicación ni varios rangos).")
+            return
+        try:
+            job_id = self._job_queue().add(inp, s, e, outdir, prefix=opts["prefix"], imgfmt=opts["imgfmt"], quality=opts["quality"],
+                                           use_pts=opts["use_pts"], cut=opts["cut"], cut_mode=opts["cut_mode"],
+                                           profile=opts["profile"])
+        except ValueError as err:
+            messagebox.showerror("Cola", str(err))
+            return
+        pending = len(self.queue.pending())
+        self.log(f"[INFO] Trabajo {job_id} añadido a la cola ({pending} pendientes): {inp.name} {s} → {e}\n")
+
+    def on_drain(self):
+        if self.extracting:
+            messagebox.showwarning("En progreso", "Ya hay una extracción en progreso. Por favor espera.")
+            return
+        if not have("ffmpeg") or not have("ffprobe"):
+            messagebox.showerror("Dependencias", "Se requieren ffmpeg y ffprobe en el PATH.")
+            return
+        try:
+            workers = max(1, int((self.var_workers.get() or "1").strip()))
+        except ValueError:
+            workers = 1
+        queue = self._job_queue()
+        if not queue.pending():
+            messagebox.showinfo("Cola", "No hay trabajos pendientes en la cola.")
+            return
+
+        self.extracting = True
+        self.current_job = JobController()
+        self.btn_extract.config(state="disabled")
+        self.btn_drain.config(state="disabled", text="Procesando cola...")
+        self.btn_cancel.config(state="normal")
+        self._show_progress(0, "")
+        thread = threading.Thread(target=self._drain_worker, args=(queue, workers, self.current_job), daemon=True)
+        thread.start()
+
+    def _drain_worker(self, queue: JobQueue, workers: int, job: JobController):
+        """Procesa los trabajos pendientes uno a uno; lo cancelado se reanuda en la próxima pasada"""
+        try:
+            for row in queue.jobs():
+                if row["status"] not in ("pending", "running"): continue
+                if job.cancelled.is_set(): break
+                self.post_log(f"[INFO] Trabajo {row['id']}: {Path(row['input']).name}\n")
+                total_s = (row["end_us"] - row["start_us"]) / 1_000_000
+                res = queue.run_job(row["id"], workers=workers, log=self.post_log,
+                                    on_progress=self._progress_callback(total_s), job=job)
+                if res["status"] == "ok":
+                    self.after(0, lambda r=res: self._show_progress(100, f"Trabajo {r['id']}: {r['frames']} frames en {r['seconds']:.1f} s"))
+            left = len(queue.pending())
+            self.post_log(f"[INFO] Cola: {left} trabajos pendientes\n" if left else "[✅] Cola terminada\n")
+        except Exception as e:
+            self.post_log(f"[ERROR] Error inesperado: {e}\n")
+        finally:
+            self.after(0, self._extraction_done)
+
+    def on_cancel(self):
+        """Detiene los procesos FFmpeg del trabajo en curso (el worker limpia al terminar)"""
+        if not self.extracting or self.current_job is None: return
+        self.btn_cancel.config(state="disabled", text="Cancelando…")
+        self.post_log("[INFO] Cancelando…\n")
+        self.current_job.cancel()
+
+    def _extract_worker(self, inp: Path, s: str, e: str, outdir: Path, opts: dict, job: JobController):
         """Ejecuta la extracción en un thread separado"""
         try:
-            # (Opcional) recorte a MP4 con precisión por cuadro
-            if self.var_do_cut.get():
-                cutpath = Path(self.var_cutfile.get().strip() or "recorte.mp4")
-                cut_cmd = ["ffmpeg","-hide_banner","-loglevel","error","-i",str(inp), "-ss", s, "-to", e,
-                           "-c:v","libx264","-crf","18","-preset","veryfast","-c:a","aac","-b:a","192k", str(cutpath)]
-                self.after(0, lambda: self.log("[INFO] Cortando fragmento de video…\n"))
-                rc,out = run_ffmpeg(cut_cmd)
-                self.after(0, lambda: self.log(out+"\n"))
-                if rc!=0:
-                    self.after(0, lambda: self.log("[ERROR] Falló el recorte.\n"))
-                    return
-                self.after(0, lambda: self.log(f"[OK] Recorte: {cutpath}\n"))
-
-            # Extracción de frames nativos (sin cambiar FPS)
-            # Normalizar extensiones
-            ext_map = {"jpeg": "jpg", "tif": "tiff"}
-            ext = ext_map.get(imgfmt, imgfmt)
-            pattern = str((outdir / f"{prefix}_%06d.{ext}").resolve())
-            extract_cmd = ["ffmpeg","-hide_banner","-loglevel","error","-i",str(inp), "-ss", s, "-to", e, "-vsync","0"]
-            if self.var_use_pts.get(): extract_cmd += ["-frame_pts","1"]
-            
-            # Configuración de calidad según formato
-            if imgfmt in ("jpg", "jpeg"):
-                q = int((self.var_q.get() or "2").strip())
-                extract_cmd += ["-q:v", str(q)]
-            elif imgfmt == "webp":
-                q = int((self.var_q.get() or "2").strip())
-                webp_quality = int(100 - ((q - 2) * (70 / 29)))
-                if webp_quality < 0: webp_quality = 0
-                if webp_quality > 100: webp_quality = 100
-                extract_cmd += ["-quality", str(webp_quality)]
-            elif imgfmt == "gif":
-                extract_cmd += ["-pix_fmt", "rgb24"]
-            # BMP, TIFF son sin pérdida
-            
-            extract_cmd += [pattern]
-
-            self.after(0, lambda: self.log(f"[INFO] Extrayendo frames nativos en formato {imgfmt.upper()}…\n"))
-            rc,out = run_ffmpeg(extract_cmd)
-            self.after(0, lambda: self.log(out+"\n"))
-            if rc!=0:
-                self.after(0, lambda: self.log("[ERROR] Falló la extracción de frames.\n"))
-            else:
-                self.after(0, lambda: self.log(f"[✅] Frames extraídos exitosamente en: {outdir.resolve()}\n"))
-                self.after(0, lambda: messagebox.showinfo("✨ Completado", f"Frames en formato {imgfmt.upper()} guardados en:\n{outdir.resolve()}"))
+            total_s = max(0.0, hhmmss_ms_to_seconds(e) - hhmmss_ms_to_seconds(s))
+            res = extract_frames(inp, s, e, outdir, log=self.post_log, on_progress=self._progress_callback(total_s), job=job, **opts)
+            if res["status"] == "ok":
+                fmt = opts["imgfmt"].upper()
+                self.after(0, lambda: self._show_progress(100, f"Frames: 100% · {res['frames']} frames en {res['seconds']:.1f} s"))
+                dest = res["archive"] or outdir.resolve()
+                self.after(0, lambda: messagebox.showinfo("✨ Completado", f"Frames en formato {fmt} guardados en:\n{dest}"))
         except Exception as e:
-            self.after(0, lambda: self.log(f"[ERROR] Error inesperado: {e}\n"))
+            self.post_log(f"[ERROR] Error inesperado: {e}\n")
         finally:
             # Restaurar estado
             self.after(0, self._extraction_done)
 
+    def _ranges_worker(self, inp: Path, ranges: list, outdir: Path, opts: dict, job: JobController):
+        """Varios rangos como un solo trabajo; el valor de Workers es el número de rangos a la vez"""
+        try:
+            jobs = opts.pop("workers")
+            total_s = sum(r["end_us"] - r["start_us"] for r in ranges) / 1_000_000  # aprox.: antes de juntar solapados
+            res = extract_ranges(inp, ranges, outdir, jobs=jobs, log=self.post_log, on_progress=self._progress_callback(total_s),
+                                 job=job, **opts)
+            if res["status"] == "ok":
+                n = len(res["ranges"])
+                self.after(0, lambda: self._show_progress(100, f"Rangos: 100% · {res['frames']} frames en {res['seconds']:.1f} s"))
+                self.after(0, lambda: messagebox.showinfo("✨ Completado", f"{n} rangos ({res['frames']} frames) guardados en:\n{outdir.resolve()}"))
+        except Exception as e:
+            self.post_log(f"[ERROR] Error inesperado: {e}\n")
+        finally:
+            self.after(0, self._extraction_done)
+
     def _extraction_done(self):
         """Restaura el estado de la UI después de la extracción"""
         self.extracting = False
-        self.current_process = None
+        self.current_job = None
         self.btn_extract.config(state="normal", text="Extraer frames")
+        self.btn_cancel.config(state="disabled", text="Cancelar")
+        self.btn_drain.config(state="normal", text="Procesar cola")
+        self.btn_preview.config(state="normal", text="Generar vista previa")
 
 if __name__ == "__main__":
     app = App()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,109 @@
+"""Banco de pruebas de VideoToFrame: genera un clip sintético con testsrc2 y mide los caminos de
+extracción y recorte con distintos formatos, rangos y opciones.
+
+Cada caso se ejecuta en un proceso aparte (frame_engine.py o FFmpeg directamente), así que el tiempo
+de CPU y el pico de memoria (RSS) son los de ese caso: incluyen los procesos FFmpeg que lanza. Los
+casos "decodificar" y "codificar-<fmt>" no escriben imágenes y sirven de referencia para separar
+cuánto cuesta decodificar, codificar y escribir. El informe es JSON:
+
+    python frame_engine.py bench --size 1920x1080 --duration 30 --out bench.json
+"""
+import json, os, platform, subprocess, sys, tempfile, time
+from pathlib import Path
+
+from frame_engine import PIPE_CODECS, image_encoder_args
+
+ENGINE = str(Path(__file__).with_name("frame_engine.py"))
+BENCH_FORMATS = ("png", "jpg", "webp", "bmp")
+
+def make_test_clip(path: Path, size: str = "1280x720", rate: int = 25, duration: float = 20.0, gop: int = 50) -> Path:
+    """testsrc2 + tono de 1 kHz en H.264/AAC con un keyframe exacto cada `gop` frames."""
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y",
+                    "-f","lavfi","-i", f"testsrc2=size={size}:rate={rate}:duration={duration:g}",
+                    "-f","lavfi","-i", f"sine=frequency=1000:duration={duration:g}",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p","-g",str(gop),"-keyint_min",str(gop),
+                    "-sc_threshold","0","-c:a","aac","-shortest", str(path)], check=True)
+    return Path(path)
+
+def run_case(name: str, cmd: list[str]) -> dict:
+    """Ejecuta un caso y mide tiempo real, CPU (usuario + sistema) y pico de RSS del árbol de procesos.
+    Los comandos de FFmpeg deben llevar -progress pipe:1; los de frame_engine.py, --json."""
+    t0 = time.perf_counter()
+    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, text=True)
+    out = p.stdout.read()
+    cpu = rss = None
+    if hasattr(os, "wait4"):  # la rusage de wait4 incluye a los hijos ya terminados del proceso (FFmpeg)
+        _pid, status, ru = os.wait4(p.pid, 0)
+        p.returncode = os.waitstatus_to_exitcode(status)
+        cpu = round(ru.ru_utime + ru.ru_stime, 3)
+        rss = round(ru.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes en macOS, KiB en Linux
+    else:
+        p.wait()
+    wall = time.perf_counter() - t0
+    row = {"name": name, "rc": p.returncode, "frames": 0, "wall_s": round(wall, 3), "cpu_s": cpu, "peak_rss_mb": rss}
+    try:
+        res = json.loads(out)
+        row.update(frames=res.get("frames", len(res.get("files", []))), timings=res.get("timings"))
+    except ValueError:
+        frames = [line.split("=", 1)[1] for line in out.splitlines() if line.startswith("frame=")]
+        if frames: row["frames"] = int(frames[-1])
+    row["fps"] = round(row["frames"] / wall, 2) if wall > 0 else 0.0
+    return row
+
+def default_cases(clip: Path, duration: float, workdir: Path, formats=BENCH_FORMATS, max_workers: int | None = None) -> list[tuple[str, list[str]]]:
+    """(nombre, comando) de cada caso sobre un tramo de 4 s en mitad del clip."""
+    s, e = max(0.0, duration / 2 - 2), min(duration, duration / 2 + 2)
+    rng = ["--start", f"{s:g}", "--end", f"{e:g}"]
+    py = [sys.executable, ENGINE]
+    ff = ["ffmpeg","-hide_banner","-loglevel","error","-nostats","-progress","pipe:1","-y","-ss",f"{s:g}","-i",str(clip),"-t",f"{e - s:g}"]
+    out = lambda name: ["--outdir", str(workdir / name), "--json"]
+    cases = [("decodificar", ff + ["-f","null", os.devnull])]
+    for fmt in formats:
+        if fmt in PIPE_CODECS:  # codificar sin escribir: image2pipe a /dev/null
+            cases.append((f"codificar-{fmt}", ff + ["-vsync","0","-c:v",PIPE_CODECS[fmt], *image_encoder_args(fmt), "-f","image2pipe", os.devnull]))
+        cases.append((f"extraer-{fmt}", py + ["extract", str(clip), *rng, "--fmt", fmt, *out(f"extraer-{fmt}")]))
+    cases += [
+        ("extraer-png-sin-seek", py + ["extract", str(clip), *rng, "--no-fast-seek", *out("sin-seek")]),
+        ("extraer-png-rápido", py + ["extract", str(clip), *rng, "--profile", "rápido", *out("rapido")]),
+        ("extraer-jpg-320", py + ["extract", str(clip), *rng, "--fmt", "jpg", "--scale", "320", *out("jpg-320")]),
+        ("muestreo-fps-1", py + ["extract", str(clip), "--sample", "fps", "--sample-value", "1", *out("fps-1")]),
+        ("muestreo-keyframes", py + ["extract", str(clip), "--sample", "keyframes", *out("keyframes")]),
+        ("recorte-exacto", py + ["extract", str(clip), *rng, "--fmt", "jpg", "--cut", str(workdir / "exacto.mp4"), *out("recorte-exacto")]),
+        ("recorte-rápido", py + ["extract", str(clip), *rng, "--fmt", "jpg", "--cut", str(workdir / "rapido.mp4"),
+                                 "--cut-mode", "rápido", *out("recorte-rapido")]),
+        ("pack-jpg", py + ["extract", str(clip), *rng, "--fmt", "jpg", "--sink", "pack", *out("pack")]),
+        ("vista-previa", py + ["preview", str(clip), "--sheet", "--outdir", str(workdir / "preview")]),
+    ]
+    max_workers = max_workers or os.cpu_count() or 1
+    n = 2
+    while n <= max_workers:
+        cases.append((f"extraer-png-{n}-workers", py + ["extract", str(clip), *rng, "--workers", str(n), *out(f"w{n}")]))
+        n *= 2
+    return cases
+
+def ffmpeg_version() -> str:
+    try:
+        return subprocess.run(["ffmpeg","-version"], capture_output=True, text=True).stdout.split("\n", 1)[0]
+    except OSError:
+        return ""
+
+def run_suite(clip: Path | None = None, size: str = "1280x720", rate: int = 25, duration: float = 20.0, gop: int = 50,
+              formats=BENCH_FORMATS, max_workers: int | None = None, log=lambda _t: None) -> dict:
+    """Genera el clip (o usa `clip`), ejecuta default_cases y devuelve el informe completo."""
+    with tempfile.TemporaryDirectory(prefix="vtf_bench_") as tmp:
+        tmp = Path(tmp)
+        if clip is None:
+            log(f"[INFO] Generando clip de prueba {size} a {rate} fps, {duration:g} s…\n")
+            clip = make_test_clip(tmp / "testsrc.mp4", size, rate, duration, gop)
+            info = {"generated": True, "size": size, "rate": rate, "duration": duration, "gop": gop}
+        else:
+            from frame_engine import ffprobe_duration_seconds
+            duration = ffprobe_duration_seconds(clip) or duration
+            info = {"generated": False, "path": str(clip), "duration": duration}
+        cases = []
+        for name, cmd in default_cases(Path(clip), duration, tmp, formats, max_workers):
+            log(f"[INFO] {name}…\n")
+            cases.append(run_case(name, cmd))
+    return {"machine": {"cpu_count": os.cpu_count(), "platform": platform.platform(), "python": platform.python_version(),
+                        "ffmpeg": ffmpeg_version()},
+            "clip": info, "cases": cases}
@@ -0,0 +1,1993 @@
+"""Motor de VideoToFrame: extracción de frames y recorte con FFmpeg, sin interfaz gráfica.
+
+Se puede importar (no depende de tkinter) o usar desde la terminal:
+
+    python frame_engine.py extract video.mp4 --start 00:01:00 --end 00:01:05 --fmt png
+    python frame_engine.py batch carpeta_o_glob_o_lista.txt --jobs 4 --outdir frames_out
+"""
+import shutil, subprocess, math, threading, json, os, sys, time, tempfile, argparse, glob, queue, re, atexit
+import bisect, csv, io, mmap, struct, tarfile, zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_OUTDIR = "frames_out"
+LOG_TAIL_LINES = 200      # líneas de stderr que se conservan por proceso
+PROGRESS_INTERVAL = 0.25  # segundos entre actualizaciones de progreso/log
+CANCEL_GRACE = 3.0        # segundos que se espera a FFmpeg tras pedirle que pare, antes de forzarlo
+CANCELLED_RC = -2         # código devuelto por run_ffmpeg cuando el trabajo se canceló
+
+def user_cache_dir() -> Path:
+    """Carpeta de caché del usuario (XDG en Linux, Library/Caches en macOS, LOCALAPPDATA en Windows)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "videotoframe"
+
+# VIDEOTOFRAME_PROBE_CACHE=<ruta> usa otro archivo; vacío u "off" desactiva la caché en disco
+_probe_env = os.environ.get("VIDEOTOFRAME_PROBE_CACHE")
+PROBE_CACHE_PATH = (None if _probe_env.strip().lower() in ("", "0", "off", "no") else _probe_env) if _probe_env is not None \
+    else str(user_cache_dir() / "probe.json")
+PROBE_CACHE_SIZE = 500    # videos que recuerda la caché de ffprobe (se descartan los menos usados)
+PROBE_SAVE_INTERVAL = 5.0 # segundos mínimos entre escrituras de la caché (y una última al salir)
+TUNE_PATH = str(user_cache_dir() / "tune.json")  # resultados del auto-ajuste
+
+def have(bin_name: str) -> bool:
+    return shutil.which(bin_name) is not None
+
+def parse_progress(stats: dict, state: str) -> dict:
+    """Convierte un bloque key=value de -progress en números (None si FFmpeg da N/A)."""
+    def num(key, cast=float):
+        try: return cast(stats.get(key, "").strip().rstrip("x"))
+        except ValueError: return None
+    us = num("out_time_us", int)
+    if us is None: us = num("out_time_ms", int)  # FFmpeg antiguo: también en µs pese al nombre
+    return {"frame": num("frame", int), "fps": num("fps"), "speed": num("speed"),
+            "out_time": us / 1_000_000 if us is not None and us >= 0 else None, "end": state == "end"}
+
+class JobController:
+    """Procesos FFmpeg vivos de un trabajo. cancel() los detiene todos: primero pide a FFmpeg
+    que termine ('q' por stdin, cierra bien los archivos), luego terminate() y por último kill().
+    Los procesos que leen datos por stdin se registran con quit=False: no se les escribe nada, quien
+    los alimenta cierra su stdin al ver la cancelación."""
+    def __init__(self, grace: float = CANCEL_GRACE):
+        self.grace = grace
+        self.cancelled = threading.Event()
+        self._procs = {}
+        self._lock = threading.Lock()
+
+    def register(self, p: subprocess.Popen, quit: bool = True) -> bool:
+        with self._lock:
+            if self.cancelled.is_set(): return False
+            self._procs[p] = quit; return True
+
+    def unregister(self, p: subprocess.Popen):
+        with self._lock: self._procs.pop(p, None)
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled.is_set(): return
+            self.cancelled.set()
+            procs = list(self._procs.items())
+        for p, quit in procs:
+            threading.Thread(target=self._stop, args=(p, quit), daemon=True).start()
+
+    def _stop(self, p: subprocess.Popen, quit: bool = True):
+        if quit:
+            try:  # stdin de texto (run_ffmpeg) o binario (pipes de frames)
+                p.stdin.write("q\n" if isinstance(p.stdin, io.TextIOBase) else b"q\n"); p.stdin.flush()
+            except Exception:
+                pass
+        for action in (None, p.terminate, p.kill):
+            if action is not None:
+                try: action()
+                except Exception: pass
+            try:
+                p.wait(timeout=self.grace); return
+            except subprocess.TimeoutExpired:
+                continue
+
+def run_ffmpeg(cmd: list[str], on_progress=None, on_log=None, interval: float = PROGRESS_INTERVAL,
+               job: JobController | None = None) -> tuple[int, str]:
+    """Ejecuta FFmpeg leyendo su salida en streaming (memoria constante aunque el trabajo sea largo).
+
+    on_progress(dict) recibe frame/fps/out_time/speed de -progress pipe:1, como mucho cada `interval` s.
+    on_log(str) recibe el stderr en lotes. Con `job` el proceso se puede cancelar desde otro thread.
+    Devuelve (código, últimas LOG_TAIL_LINES líneas de stderr); CANCELLED_RC si se canceló."""
+    if job is not None and job.cancelled.is_set():
+        return CANCELLED_RC, "Cancelado"
+    if on_progress is not None:
+        cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    tail = deque(maxlen=LOG_TAIL_LINES)
+    try:
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE if job is not None else subprocess.DEVNULL,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace")
+    except Exception as e:
+        if on_log is not None: on_log(f"ERROR ejecutando FFmpeg: {e}\n")
+        return 1, f"ERROR ejecutando FFmpeg: {e}"
+    if job is not None and not job.register(p):
+        p.kill(); p.wait()
+        return CANCELLED_RC, "Cancelado"
+
+    def pump_stderr():
+        batch, last = [], time.monotonic()
+        for line in p.stderr:
+            tail.append(line)
+            if on_log is None: continue
+            batch.append(line)
+            if time.monotonic() - last >= interval:
+                on_log("".join(batch)); batch.clear(); last = time.monotonic()
+        if on_log is not None and batch: on_log("".join(batch))
+
+    t = threading.Thread(target=pump_stderr, daemon=True); t.start()
+    stats, last = {}, 0.0
+    for line in p.stdout:  # bloques key=value que terminan en progress=continue|end
+        k, _, v = line.strip().partition("=")
+        if k != "progress":
+            stats[k] = v; continue
+        if on_progress is not None and (v == "end" or time.monotonic() - last >= interval):
+            on_progress(parse_progress(stats, v)); last = time.monotonic()
+    rc = p.wait(); t.join()
+    if job is not None:
+        job.unregister(p)
+        if job.cancelled.is_set(): return CANCELLED_RC, "".join(tail)
+    return rc, "".join(tail)
+
+# === Caché de metadatos (ffprobe) ===
+# Clave: ruta absoluta + tamaño + mtime; si el archivo cambia, la entrada deja de coincidir.
+# Cada entrada guarda el resultado de un único ffprobe (formato + streams) y, a medida que los
+# seeks lo piden, los keyframes encontrados y los intervalos ya escaneados.
+STREAM_KEYS = ("index", "codec_type", "codec_name", "profile", "level", "pix_fmt", "width", "height", "avg_frame_rate",
+               "r_frame_rate", "nb_frames", "field_order", "color_range", "color_space", "color_transfer", "color_primaries",
+               "sample_rate", "channels")
+PROBE_VERSION = 4  # sube al cambiar STREAM_KEYS o cómo se leen los keyframes: las entradas de versiones anteriores
+                   # se vuelven a leer (las de la 3 tienen keyframes mal leídos si el archivo no empieza en 0)
+
+def _rate(txt: str | None) -> float | None:
+    try:
+        n, _, d = (txt or "").partition("/")
+        return float(n) / float(d or 1) if float(d or 1) else None
+    except ValueError:
+        return None
+
+class ProbeCache:
+    """Caché LRU en disco (JSON) con los metadatos de ffprobe. Segura entre threads.
+    El archivo se lee en el primer uso y los cambios se escriben agrupados: como mucho uno cada
+    `save_interval` s, fuera del lock, y lo pendiente al cerrar el programa (o con flush())."""
+    def __init__(self, path: str | Path | None = PROBE_CACHE_PATH, size: int = PROBE_CACHE_SIZE,
+                 save_interval: float = PROBE_SAVE_INTERVAL):
+        self.path = Path(path) if path else None
+        self.size = size
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._loaded = self.path is None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if self.path is not None: atexit.register(self.flush)
+
+    def _load(self):
+        """Con self._lock tomado."""
+        self._loaded = True
+        try:
+            self._entries.update(json.loads(self.path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            pass  # sin caché o corrupta: se empieza de cero
+
+    @staticmethod
+    def key(path: Path) -> str | None:
+        try:
+            p = Path(path).resolve(); st = p.stat()
+        except OSError:
+            return None
+        return f"{p}|{st.st_size}|{st.st_mtime_ns}"
+
+    def _changed(self):
+        """Con self._lock tomado: marca cambios y dice si toca escribir ya."""
+        self._dirty = self.path is not None
+        return self._dirty and time.monotonic() - self._saved_at >= self.save_interval
+
+    def flush(self):
+        """Escribe la caché si hay cambios pendientes."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty: return
+                data = json.dumps(self._entries)
+                self._dirty, self._saved_at = False, time.monotonic()
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".probe", suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp, self.path)
+            except OSError:
+                pass  # la caché es opcional
+
+    def get(self, path: Path) -> dict | None:
+        """Metadatos del archivo; solo llama a ffprobe si no están en caché."""
+        key = self.key(path)
+        if key is None: return None
+        with self._lock:
+            if not self._loaded: self._load()
+            if key in self._entries and self._entries[key].get("v") == PROBE_VERSION:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        info = _probe(path)
+        if info is None: return None
+        with self._lock:
+            self._entries[key] = info
+            # entradas viejas del mismo archivo (cambió tamaño/mtime)
+            for old in [k for k in self._entries if k != key and k.rsplit("|", 2)[0] == key.rsplit("|", 2)[0]]:
+                del self._entries[old]
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            save = self._changed()
+        if save: self.flush()
+        return info
+
+    def known_keyframe(self, path: Path, t_us: int) -> int | None:
+        """Keyframe <= t_us si un escaneo anterior ya lo encontró sin dejar huecos hasta t_us."""
+        info = self.get(path)
+        if info is None: return None
+        with self._lock:
+            kfs = info.get("keyframes", [])
+            for lo, hi in info.get("scanned", []):
+                if lo <= t_us <= hi:
+                    before = [k for k in kfs if lo <= k <= t_us]
+                    if before: return before[-1]
+                    if lo == 0: return 0
+        return None
+
+    def add_keyframes(self, path: Path, lo_us: int, hi_us: int, kfs: list[int]):
+        """Anota que [lo_us, hi_us] ya se escaneó y los keyframes que tenía."""
+        info = self.get(path)
+        if info is None: return
+        with self._lock:
+            info["keyframes"] = sorted(set(info.get("keyframes", [])) | set(kfs))
+            merged = []
+            for a, b in sorted(info.get("scanned", []) + [[lo_us, hi_us]]):
+                if merged and a <= merged[-1][1]: merged[-1][1] = max(merged[-1][1], b)
+                else: merged.append([a, b])
+            info["scanned"] = merged
+            save = self._changed()
+        if save: self.flush()
+
+def _probe(path: Path) -> dict | None:
+    """Un solo ffprobe: formato y todos los streams, reducido a lo que usa la aplicación."""
+    try:
+        out = subprocess.check_output(
+            ["ffprobe","-v","error","-show_entries","format=duration,start_time,format_name,bit_rate:format_tags=timecode:"
+             "stream=" + ",".join(STREAM_KEYS) + ":stream_tags=timecode",
+             "-of","json", str(path)],
+            text=True
+        )
+        data = json.loads(out or "{}")
+    except Exception:
+        return None
+    fmt = data.get("format", {})
+    def num(v):
+        try: return float(v)
+        except (TypeError, ValueError): return None
+    streams = [{k: st[k] for k in STREAM_KEYS if k in st} for st in data.get("streams", [])]
+    video = next((st for st in streams if st.get("codec_type") == "video"), None)
+    if video is not None: video["fps"] = _rate(video.get("avg_frame_rate")) or _rate(video.get("r_frame_rate"))
+    # timecode inicial: en el formato (MXF, algunos MP4) o en un stream (pista tmcd de MOV/MP4)
+    tcs = [(fmt.get("tags") or {}).get("timecode")] + [(st.get("tags") or {}).get("timecode") for st in data.get("streams", [])]
+    return {"v": PROBE_VERSION, "duration": num(fmt.get("duration")), "start_time": num(fmt.get("start_time")) or 0.0,
+            "format_name": fmt.get("format_name"), "timecode": next((tc for tc in tcs if tc), None),
+            "streams": streams, "video": video}
+
+PROBE_CACHE = ProbeCache()
+
+def probe(path: Path) -> dict | None:
+    """Metadatos del video (duración, streams, fps...) desde la caché compartida."""
+    return PROBE_CACHE.get(path)
+
+def ffprobe_duration_seconds(path: Path) -> float | None:
+    info = probe(path)
+    return info["duration"] if info else None
+
+def ffprobe_timecode(path: Path) -> str | None:
+    """Timecode del primer frame ("01:00:00:00", ";" si es drop-frame) o None si el archivo no lo tiene."""
+    info = probe(path)
+    return info["timecode"] if info else None
+
+def ffprobe_video_stream(path: Path) -> dict | None:
+    """codec_name, pix_fmt, width, height (y fps) del primer stream de video."""
+    info = probe(path)
+    return info["video"] if info else None
+
+def seconds_to_hhmmss_ms(sec: float) -> str:
+    if sec < 0: sec = 0.0
+    ms = int(round(sec * 1000))
+    h = ms // 3_600_000
+    ms %= 3_600_000
+    m = ms // 60_000
+    ms %= 60_000
+    s = ms // 1000
+    ms %= 1000
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+def hhmmss_ms_to_seconds(txt: str) -> float:
+    t = txt.strip()
+    if not t: return 0.0
+    if ":" not in t:
+        return float(t)  # segundos como "12.5"
+    # HH:MM:SS.mmm
+    hh, mm, ss = t.split(":")
+    if "." in ss:
+        ss_i, ms = ss.split(".")
+        ms = ms.ljust(3, "0")[:3]
+        total = int(hh)*3600 + int(mm)*60 + int(ss_i) + int(ms)/1000.0
+    else:
+        total = int(hh)*3600 + int(mm)*60 + int(ss)
+    return float(total)
+
+# === Seek rápido por keyframes ===
+# Los tiempos se manejan en microsegundos enteros (la unidad interna de FFmpeg) para que
+# el punto de corte del camino rápido coincida exactamente con el del camino lento.
+def seconds_to_us(sec: float) -> int:
+    return int(round(sec * 1_000_000))
+
+def us_to_arg(us: int) -> str:
+    if us < 0: us = 0
+    return f"{us // 1_000_000}.{us % 1_000_000:06d}"
+
+def ffprobe_packets(path: Path, start: float | None = None, end: float | None = None) -> list[tuple[int, bool]] | None:
+    """Paquetes (pts en µs relativo al inicio del archivo, es_keyframe) del primer stream de video, ordenados por pts.
+    Solo lee paquetes, no decodifica. Con start/end (relativos al inicio) se limita a esa ventana."""
+    # -read_intervals usa timestamps absolutos: en TS/M2TS/MTS el archivo no empieza en 0
+    t0 = (probe(path) or {}).get("start_time") or 0.0
+    cmd = ["ffprobe","-v","error","-select_streams","v:0","-show_entries","packet=pts_time,dts_time,flags","-of","json"]
+    if start is not None or end is not None:
+        a = f"{max(0.0, start) + t0:.6f}" if start is not None else ""
+        b = f"{end + t0:.6f}" if end is not None else ""
+        cmd += ["-read_intervals", f"{a}%{b}"]
+    try:
+        data = json.loads(subprocess.check_output(cmd + [str(path)], text=True) or "{}")
+    except Exception:
+        return None
+    pkts = {}
+    for pkt in data.get("packets", []):
+        t = pkt.get("pts_time", pkt.get("dts_time"))
+        if t in (None, "N/A"): continue
+        # floor: nunca pedir un seek posterior al keyframe real
+        us = max(0, math.floor((float(t) - t0) * 1_000_000))
+        pkts[us] = pkts.get(us, False) or "K" in pkt.get("flags", "")
+    return sorted(pkts.items())
+
+def ffprobe_keyframes(path: Path, start: float | None = None, end: float | None = None) -> list[int] | None:
+    """Tiempos (µs, relativos al inicio del archivo) de los keyframes del primer stream de video."""
+    pkts = ffprobe_packets(path, start, end)
+    return None if pkts is None else [us for us, key in pkts if key]
+
+def keyframe_before(path: Path, t_us: int, window: float = 30.0) -> int | None:
+    """Keyframe más cercano <= t_us. Escanea una ventana hacia atrás y la agranda si no hay ninguno.
+    Lo escaneado queda en la caché, así que repetir un seek cercano no vuelve a lanzar ffprobe."""
+    k = PROBE_CACHE.known_keyframe(path, t_us)
+    if k is not None: return k
+    t = t_us / 1_000_000
+    while True:
+        lo = max(0.0, t - window)
+        kfs = ffprobe_keyframes(path, lo, t + 0.001)
+        if kfs is None: return None
+        # -read_intervals empieza en el keyframe anterior a lo: lo escaneado llega hasta ahí
+        PROBE_CACHE.add_keyframes(path, min([seconds_to_us(lo)] + kfs), t_us, kfs)
+        before = [k for k in kfs if k <= t_us]
+        if before: return before[-1]
+        if lo <= 0.0: return 0
+        window *= 4
+
+def seek_args(inp: Path, s_us: int, e_us: int, fast: bool = True) -> tuple[list[str], list[str], int | None]:
+    """Argumentos (antes de -i, después de -i) para quedarse con [s, e] con precisión de frame.
+
+    En modo rápido se hace input-seek al keyframe previo (FFmpeg no decodifica nada antes)
+    y luego se recorta el resto con -ss/-to de salida relativos a ese keyframe.
+    Devuelve también el keyframe usado (None si se usó el camino lento)."""
+    if fast and s_us > 0:
+        k = keyframe_before(inp, s_us)
+        if k is not None and k > 0:
+            return ["-ss", us_to_arg(k)], ["-ss", us_to_arg(s_us - k), "-to", us_to_arg(e_us - k)], k
+    return [], ["-ss", us_to_arg(s_us), "-to", us_to_arg(e_us)], None
+
+# === Extracción de frames ===
+EXT_MAP = {"jpeg": "jpg", "tif": "tiff"}  # Normalizar extensiones
+
+# === Perfiles de rendimiento ===
+# En los frames solo cambian el esfuerzo de compresión, nunca los píxeles: PNG/TIFF siguen sin pérdida
+# y JPG/WebP se codifican igual. WebP no entra: en libwebp compression_level es el "method" de cwebp
+# y cambia la imagen (el 0 da peor calidad con el mismo -quality). El recorte MP4 sí cambia con el
+# preset de x264: a igual CRF, "rápido" da un archivo algo peor y más grande.
+PROFILES = ("rápido", "equilibrado", "compacto")
+PROFILE_ARGS = {
+    "png":  {"rápido": ["-compression_level","1"], "equilibrado": [], "compacto": ["-compression_level","9","-pred","mixed"]},
+    "tiff": {"rápido": ["-compression_algo","raw"], "equilibrado": [], "compacto": ["-compression_algo","deflate"]},
+}
+X264_PRESETS = {"rápido": "ultrafast", "equilibrado": "veryfast", "compacto": "slow"}
+
+def image_encoder_args(imgfmt: str, q: int = 2, profile: str = "equilibrado") -> list[str]:
+    """Opciones de calidad según formato (BMP, TIFF, PNG son sin pérdida) y del perfil de rendimiento."""
+    extra = PROFILE_ARGS.get(EXT_MAP.get(imgfmt, imgfmt), {}).get(profile, [])
+    if imgfmt in ("jpg", "jpeg"):
+        return ["-q:v", str(q)]
+    if imgfmt == "webp":
+        webp_quality = int(100 - ((q - 2) * (70 / 29)))
+        # libwebp explícito: el codificador por defecto (libwebp_anim) junta todo en un único WebP animado
+        return ["-c:v", "libwebp", "-quality", str(min(100, max(0, webp_quality))), *extra]
+    if imgfmt == "gif":
+        return ["-pix_fmt", "rgb24"]
+    return extra
+
+def x264_args(profile: str = "equilibrado") -> list[str]:
+    return ["-c:v","libx264","-crf","18","-preset", X264_PRESETS.get(profile, "veryfast")]
+
+def thread_args(workers: int = 1, threads: int | None = None) -> list[str]:
+    """Hilos de decodificación y de filtros por proceso: los núcleos repartidos entre los workers.
+    Van antes de -i (-threads ahí es del decodificador)."""
+    n = threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+    return ["-filter_threads", str(n), "-threads", str(n)]
+
+# === Muestreo: no codificar ni escribir frames que nadie va a usar ===
+SAMPLE_MODES = ("todos", "cada-n", "fps", "keyframes", "escena")
+SAMPLE_DEFAULTS = {"cada-n": 10, "fps": 1.0, "escena": 0.3}  # N, fps de salida, umbral de cambio de escena
+
+def sample_value(sample: str, value: float | None) -> float | None:
+    """Valida el modo de muestreo y su valor (o pone el valor por defecto). Lanza ValueError."""
+    if sample not in SAMPLE_MODES:
+        raise ValueError(f"Modo de muestreo inválido. Modos: {', '.join(SAMPLE_MODES)}")
+    if sample not in SAMPLE_DEFAULTS: return None
+    value = SAMPLE_DEFAULTS[sample] if value is None else value
+    if sample == "cada-n" and (value != int(value) or value < 1):
+        raise ValueError("N debe ser un entero mayor o igual a 1.")
+    if sample == "fps" and value <= 0:
+        raise ValueError("Los fps de salida deben ser mayores que 0.")
+    if sample == "escena" and not (0 < value < 1):
+        raise ValueError("El umbral de escena debe estar entre 0 y 1 (p. ej. 0.3).")
+    return int(value) if sample == "cada-n" else float(value)
+
+def sample_args(sample: str, value: float | None) -> tuple[list[str], list[str]]:
+    """Argumentos (antes de -i, después de -i) del modo de muestreo.
+    keyframes usa -skip_frame nokey: el decodificador ni siquiera decodifica el resto."""
+    if sample == "cada-n": return [], ["-vf", f"select=not(mod(n\\,{value}))"]
+    if sample == "fps": return [], ["-vf", f"fps={value:g}"]
+    if sample == "keyframes": return ["-skip_frame", "nokey"], []
+    if sample == "escena": return [], ["-vf", f"select=gt(scene\\,{value:g})"]
+    return [], []
+
+def estimate_frames(inp: Path, s_us: int, e_us: int, sample: str = "todos", value: float | None = None) -> int | None:
+    """Frames que generará la extracción de [s, e]. None si no se puede saber (escena, o fps desconocidos).
+    En modo keyframes cuenta los keyframes reales leyendo solo paquetes."""
+    dur = (e_us - s_us) / 1_000_000
+    if sample == "keyframes":
+        kfs = ffprobe_keyframes(inp, s_us / 1_000_000, e_us / 1_000_000)
+        if kfs is None: return None
+        if kfs: PROBE_CACHE.add_keyframes(inp, min(kfs[0], s_us), e_us, kfs)
+        return sum(1 for k in kfs if s_us <= k < e_us)
+    if sample == "fps":
+        return math.ceil(dur * value)
+    fps = (ffprobe_video_stream(inp) or {}).get("fps")
+    if sample == "escena" or not fps: return None
+    total = math.ceil(dur * fps)
+    return math.ceil(total / value) if sample == "cada-n" else total
+
+# === Extracción paralela por segmentos (GOP-aligned) ===
+def snap_range(inp: Path, s_us: int, e_us: int) -> tuple[int, int]:
+    """[s, e) llevado a la rejilla de frames: s al primer frame >= s y e al primer frame >= e, así que
+    salen justo los frames con pts en [s, e). Con un inicio entre dos frames FFmpeg redondea medio frame
+    al aplicar -to y al nombrar con -frame_pts, y cada segmento en paralelo lo redondearía a su manera."""
+    snapped = []
+    for t in (s_us, e_us):
+        pts = [us for us, _key in ffprobe_packets(inp, t / 1_000_000, t / 1_000_000 + 1.0) or []]
+        i = bisect.bisect_left(pts, t)
+        snapped.append(pts[i] if i < len(pts) else t)  # sin frames después: se deja como está
+    return snapped[0], snapped[1]
+
+def plan_segments(inp: Path, s_us: int, e_us: int, n: int) -> list[tuple[int, int, int]] | None:
+    """Divide [s, e) (ya ajustado con snap_range) en hasta n segmentos que empiezan en keyframes.
+    Cada segmento es (keyframe de seek, inicio, fin) en µs. Los cortes internos son el pts exacto del
+    keyframe: -to deja fuera el frame que cae justo en el fin y el segmento siguiente empieza en él."""
+    pkts = ffprobe_packets(inp, s_us / 1_000_000, e_us / 1_000_000)
+    if pkts is None: return None
+    before = [us for us, key in pkts if key and us <= s_us]
+    k0 = before[-1] if before else keyframe_before(inp, s_us)
+    if k0 is None: return None
+    inner = [us for us, key in pkts if key and s_us < us < e_us]
+    bounds = [s_us]
+    for i in range(1, n):
+        target = s_us + (e_us - s_us) * i // n
+        cand = min(inner, key=lambda k: abs(k - target), default=None)
+        if cand is not None and cand > bounds[-1]: bounds.append(cand)
+    bounds.append(e_us)
+    return [(k0 if i == 0 else a, a, b) for i, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+
+def segment_cmd(inp: Path, seg: tuple[int, int, int], s_us: int, segdir: Path, prefix: str, ext: str,
+                enc_args: list[str], use_pts: bool, threads: int = 0) -> list[str]:
+    """Comando FFmpeg de un segmento: el mismo recorte -ss/-to que una ejecución única, numera desde 1
+    en su carpeta y desplaza sus timestamps (-output_ts_offset) para que los nombres -frame_pts coincidan.
+    s_us es el inicio del rango ajustado con snap_range: el desplazamiento es un número entero de frames."""
+    seek, a, b = seg
+    cmd = ["ffmpeg","-hide_banner","-loglevel","error"] + (thread_args(threads=threads) if threads else [])
+    cmd += ["-ss", us_to_arg(seek), "-i", str(inp), "-ss", us_to_arg(a - seek), "-to", us_to_arg(b - seek),
+            "-output_ts_offset", us_to_arg(a - s_us), "-vsync","0"]
+    if use_pts: cmd += ["-frame_pts","1"]
+    return cmd + enc_args + [str((segdir / f"{prefix}_%06d.{ext}").resolve())]
+
+def merge_segments(segdirs: list[Path], counts: list[int], outdir: Path, prefix: str, ext: str, use_pts: bool) -> int:
+    """Mueve los frames de cada segmento a outdir con numeración contigua (start_number=1 como image2)
+    o con su nombre PTS tal cual. El número final sale del número local del archivo y de los frames
+    de los segmentos previos, así que repetirlo tras una interrupción no desordena nada."""
+    offset = 0
+    for d, count in zip(segdirs, counts):
+        if d.is_dir():
+            for f in d.iterdir():
+                if use_pts:
+                    f.replace(outdir / f.name); continue
+                local = int(f.stem.rsplit("_", 1)[1])
+                f.replace(outdir / f"{prefix}_{offset + local:06d}.{ext}")
+        offset += count
+    return offset
+
+def extract_parallel(inp: Path, s_us: int, e_us: int, outdir: Path, prefix: str, imgfmt: str,
+                     enc_args: list[str], use_pts: bool, workers: int, log=lambda _t: None, on_progress=None,
+                     job: JobController | None = None, keep_partial: bool = False,
+                     threads: int | None = None) -> tuple[int, str]:
+    """Extrae [s, e) (ya ajustado con snap_range) con varios procesos FFmpeg en paralelo, uno por segmento GOP-aligned.
+
+    Cada segmento escribe en una carpeta temporal; al final se renombran en orden para que
+    la numeración {prefix}_%06d sea contigua e idéntica a una ejecución única.
+    Si falla o se cancela, con keep_partial se conservan los segmentos completos del principio."""
+    segs = plan_segments(inp, s_us, e_us, workers * 2)  # más segmentos que workers: reparte mejor la carga
+    if not segs:
+        log("[ERROR] No se pudieron leer los keyframes para segmentar.\n")
+        return 1, "ERROR: no se pudieron leer los keyframes para segmentar."
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    log(f"[INFO] {len(segs)} segmentos con {workers} workers\n")
+    seg_stats, lock = {}, threading.Lock()
+
+    def seg_progress(i: int, st: dict):
+        # out_time de cada segmento es relativo a su inicio; se suma lo hecho en todos
+        with lock:
+            seg_stats[i] = dict(st, out_time=st["out_time"] or 0.0)
+            total = {"frame": sum(x["frame"] or 0 for x in seg_stats.values()),
+                     "fps": sum(x["fps"] or 0.0 for x in seg_stats.values()),
+                     "speed": sum(x["speed"] or 0.0 for x in seg_stats.values()),
+                     "out_time": sum(x["out_time"] for x in seg_stats.values()), "end": False}
+        on_progress(total)
+
+    segdirs = [outdir / f".{prefix}_seg{i:04d}" for i in range(len(segs))]
+
+    def run_segment(i: int, seg: tuple[int, int, int]) -> tuple[int, str]:
+        segdirs[i].mkdir(parents=True, exist_ok=True)
+        cmd = segment_cmd(inp, seg, s_us, segdirs[i], prefix, ext, enc_args, use_pts, threads)
+        return run_ffmpeg(cmd, on_progress=(lambda st: seg_progress(i, st)) if on_progress else None, on_log=log, job=job)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_segment, range(len(segs)), segs))
+        out = "".join(o for _rc, o in results)
+        failed = [i for i, (rc, _o) in enumerate(results) if rc != 0]
+        cancelled = job is not None and job.cancelled.is_set()
+        if failed and not cancelled:
+            log(f"[ERROR] Fallaron los segmentos {failed}\n")
+        done = len(segdirs) if not failed else (failed[0] if keep_partial else 0)
+        merge_segments(segdirs[:done], [sum(1 for _ in d.iterdir()) for d in segdirs[:done]], outdir, prefix, ext, use_pts)
+        if cancelled: return CANCELLED_RC, out
+        if failed: return 1, out + f"ERROR: fallaron los segmentos {failed}"
+        return 0, out
+    finally:
+        for d in segdirs: shutil.rmtree(d, ignore_errors=True)
+
+# === Recorte a MP4: exacto (recodifica todo) o rápido (smart cut) ===
+CUT_MODES = ("exacto", "rápido")
+X264_ARGS = x264_args("equilibrado")
+CUT_AUDIO = "a:0?"  # el recorte lleva el primer video y la primera pista de audio, salga por el camino que salga
+
+
+def cut_exact_cmd(inp: Path, s_us: int, e_us: int, outpath: Path, fast_seek: bool = True,
+                  profile: str = "equilibrado", threads: int | None = None) -> list[str]:
+    pre, post, _k = seek_args(inp, s_us, e_us, fast=fast_seek)
+    return ["ffmpeg","-hide_banner","-loglevel","error","-y", *thread_args(threads=threads), *pre, "-i",str(inp), *post,
+            "-map","0:v:0","-map",f"0:{CUT_AUDIO}", *x264_args(profile),"-c:a","aac","-b:a","192k", str(outpath)]
+
+def plan_smart_cut(inp: Path, s_us: int, e_us: int) -> list[tuple[str, int, int, int, int]] | None:
+    """Partes (tipo, keyframe de seek, inicio, fin, frames) en µs: 'encode' para los GOP parciales
+    del principio y del final, 'copy' para los GOP completos del medio. None si no hay
+    ningún GOP completo que copiar."""
+    pkts = ffprobe_packets(inp, s_us / 1_000_000, e_us / 1_000_000)
+    if not pkts: return None
+    keys = [us for us, key in pkts if key]
+    inner = [k for k in keys if s_us <= k <= e_us]
+    if len(inner) < 2: return None
+    k1, k2 = inner[0], inner[-1]
+    pts = [us for us, _key in pkts]
+    count = lambda a, b: sum(1 for p in pts if a <= p < b)
+    parts = []
+    if s_us < k1:
+        before = [k for k in keys if k <= s_us]
+        k0 = before[-1] if before else (keyframe_before(inp, s_us) or 0)
+        parts.append(("encode", k0, s_us, k1, count(s_us, k1)))
+    parts.append(("copy", k1, k1, k2, count(k1, k2)))
+    if k2 < e_us:
+        parts.append(("encode", k2, k2, e_us, count(k2, e_us)))
+    return parts
+
+# Perfiles H.264 de ffprobe -> -profile:v de libx264
+X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high",
+                 "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444"}
+COLOR_OPTS = (("color_range", "-color_range"), ("color_space", "-colorspace"), ("color_transfer", "-color_trc"),
+              ("color_primaries", "-color_primaries"))
+
+def match_h264_args(vs: dict) -> list[str] | None:
+    """Opciones de libx264 para que las partes recodificadas declaren el mismo perfil, nivel, formato de
+    píxel y color que el video original. None si algo no se puede igualar (perfil raro, entrelazado...)."""
+    prof, level = X264_PROFILES.get(vs.get("profile")), vs.get("level")
+    if prof is None or not isinstance(level, int) or level <= 0 or not vs.get("pix_fmt"): return None
+    if vs.get("field_order") not in (None, "progressive", "unknown"): return None
+    args = ["-profile:v", prof, "-level:v", str(level), "-pix_fmt", vs["pix_fmt"]]
+    for key, opt in COLOR_OPTS:
+        if vs.get(key) not in (None, "unknown"): args += [opt, vs[key]]
+    return args
+
+def smart_cut(inp: Path, s_us: int, e_us: int, outpath: Path, log=lambda _t: None, on_progress=None,
+              job: JobController | None = None, profile: str = "equilibrado") -> tuple[int, str]:
+    """Recorte rápido con la misma precisión por frame que el exacto.
+
+    Si el inicio cae en un keyframe el video se copia (-c copy) tal cual; si no, solo se
+    recodifican los GOP parciales de los extremos, el medio se copia y todo se concatena.
+    Las partes se escriben como MPEG-TS para que cada una lleve sus propios SPS/PPS.
+    Solo para H.264 (las partes recodificadas usan libx264) y solo si libx264 puede declarar el mismo
+    perfil, nivel y color que el original: el MP4 final guarda los SPS/PPS de la primera parte y un
+    cambio a mitad de archivo lo decodifican mal muchos reproductores. Si no, se usa el exacto."""
+    vs = ffprobe_video_stream(inp) or {}
+    s_us, e_us = snap_range(inp, s_us, e_us)  # partes y audio empiezan en el mismo frame
+    parts = plan_smart_cut(inp, s_us, e_us) if vs.get("codec_name") == "h264" else None
+    match = match_h264_args(vs) if parts else None
+    if not parts or (len(parts) > 1 and match is None):
+        why = "sin GOP completo o códec no H.264" if not parts else f"perfil/nivel/color no igualables: {vs.get('profile')}, nivel {vs.get('level')}"
+        log(f"[INFO] Smart cut no aplicable ({why}); recodificando todo…\n")
+        return run_ffmpeg(cut_exact_cmd(inp, s_us, e_us, outpath, profile=profile), on_progress=on_progress, on_log=log, job=job)
+    base = ["ffmpeg","-hide_banner","-loglevel","error","-y"]
+    if len(parts) == 1:
+        _kind, k, a, b, n = parts[0]
+        log("[INFO] Inicio y final en keyframes: copia directa sin recodificar\n")
+        return run_ffmpeg(base + ["-ss", us_to_arg(k), "-i", str(inp), "-to", us_to_arg(b - k), "-frames:v", str(n),
+                                  "-map","0:v:0","-map",f"0:{CUT_AUDIO}","-c","copy", str(outpath)], on_progress=on_progress, on_log=log, job=job)
+    log(f"[INFO] Smart cut: {sum(1 for p in parts if p[0] == 'encode')} GOP parciales recodificados, resto copiado\n")
+    tmp = Path(tempfile.mkdtemp(prefix=".smartcut_", dir=outpath.parent))
+    try:
+        out = ""
+        listing = []
+        for i, (kind, k, a, b, n) in enumerate(parts):
+            part = tmp / f"part{i}.ts"
+            cmd = base + ["-ss", us_to_arg(k), "-i", str(inp), "-map","0:v:0","-an"]
+            if kind == "encode":
+                # Se corta por número de frames: -to compara tiempos ya redondeados y puede perder el último
+                cmd += ["-ss", us_to_arg(a - k), "-frames:v", str(n)] + x264_args(profile) + match
+            else:
+                # En copia el corte por tiempo va por dts; se corta por número de paquetes del GOP
+                cmd += ["-frames:v", str(n), "-c:v","copy"]
+            shift = (a - s_us) / 1_000_000  # progreso de la parte, desplazado a su posición en el recorte
+            part_progress = (lambda st, shift=shift: on_progress(dict(st, out_time=(st["out_time"] or 0.0) + shift))) if on_progress else None
+            rc, o = run_ffmpeg(cmd + ["-f","mpegts", str(part)], on_progress=part_progress, on_log=log, job=job); out += o
+            if rc != 0: return rc, out
+            listing.append(f"file '{part.resolve().as_posix()}'")
+        (tmp / "list.txt").write_text("\n".join(listing) + "\n")
+        # Audio: todos los paquetes son keyframes, se copia el rango completo de una vez
+        rc, o = run_ffmpeg(base + ["-f","concat","-safe","0","-i", str(tmp / "list.txt"),
+                                   "-ss", us_to_arg(s_us), "-to", us_to_arg(e_us), "-i", str(inp),
+                                   "-map","0:v:0","-map",f"1:{CUT_AUDIO}","-c","copy", str(outpath)], on_log=log, job=job)
+        return rc, out + o
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def benchmark_workers(inp: Path, s_us: int, e_us: int, imgfmt: str = "png", max_workers: int | None = None) -> list[dict]:
+    """Mide el throughput (frames/s) extrayendo [s, e] con 1..N workers en carpetas temporales."""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2**i for i in range(1, max_workers.bit_length()) if 2**i < max_workers})
+    s_us, e_us = snap_range(inp, s_us, e_us)
+    results = []
+    for n in counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            rc, out = extract_parallel(inp, s_us, e_us, Path(tmp), "frame", imgfmt, image_encoder_args(imgfmt), False, n)
+            dt = time.perf_counter() - t0
+            frames = sum(1 for _ in Path(tmp).iterdir())
+        results.append({"workers": n, "rc": rc, "frames": frames, "seconds": round(dt, 3),
+                        "fps": round(frames / dt, 2) if dt > 0 else 0.0})
+    return results
+
+def _load_tune() -> dict:
+    try: return json.loads(Path(TUNE_PATH).read_text(encoding="utf-8"))
+    except (OSError, ValueError): return {}
+
+def autotune(inp: Path, s_us: int = 0, imgfmt: str = "png", quality: int = 2, workers: int = 1,
+             seconds: float = 2.0, log=lambda _t: None, force: bool = False) -> dict:
+    """Mide un tramo corto con cada perfil y varios números de hilos en esta máquina y devuelve el más
+    rápido (si dos van a ±5 % de velocidad, el que ocupa menos): {"profile", "threads", "fps", "results"}.
+    Se guarda por formato/workers/núcleos en TUNE_PATH, así que solo se mide una vez."""
+    cpu = os.cpu_count() or 1
+    key = f"{imgfmt}|{workers}|{cpu}"
+    tuned = _load_tune()
+    if key in tuned and not force: return tuned[key]
+    dur = ffprobe_duration_seconds(inp) or 0.0
+    e_us = min(s_us + seconds_to_us(seconds), seconds_to_us(dur)) if dur else s_us + seconds_to_us(seconds)
+    if e_us <= s_us: s_us, e_us = 0, min(seconds_to_us(seconds), seconds_to_us(dur) or seconds_to_us(seconds))
+    per = max(1, cpu // workers)
+    pre, post, _k = seek_args(inp, s_us, e_us)
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    log(f"[INFO] Auto-ajuste: midiendo {len(PROFILES)} perfiles con {sorted({1, max(1, per // 2), per})} hilos…\n")
+    rows = []
+    for profile in PROFILES:
+        for th in sorted({1, max(1, per // 2), per}):
+            with tempfile.TemporaryDirectory() as tmp:
+                cmd = ["ffmpeg","-hide_banner","-loglevel","error", *thread_args(threads=th), *pre, "-i", str(inp), *post,
+                       "-vsync","0", *image_encoder_args(imgfmt, quality, profile), str(Path(tmp) / f"f_%06d.{ext}")]
+                t0 = time.perf_counter()
+                rc, _out = run_ffmpeg(cmd)
+                dt = time.perf_counter() - t0
+                files = list(Path(tmp).iterdir())
+                rows.append({"profile": profile, "threads": th, "rc": rc, "frames": len(files),
+                             "fps": round(len(files) / dt, 2) if dt > 0 else 0.0,
+                             "bytes": sum(f.stat().st_size for f in files)})
+    ok = [r for r in rows if r["rc"] == 0 and r["frames"]]
+    if not ok:
+        return {"profile": "equilibrado", "threads": None, "fps": 0.0, "results": rows}
+    top = max(r["fps"] for r in ok)
+    best = min((r for r in ok if r["fps"] >= 0.95 * top), key=lambda r: r["bytes"])
+    result = {"profile": best["profile"], "threads": best["threads"], "fps": best["fps"], "results": rows}
+    tuned[key] = result
+    try:
+        Path(TUNE_PATH).parent.mkdir(parents=True, exist_ok=True)
+        Path(TUNE_PATH).write_text(json.dumps(tuned, ensure_ascii=False, indent=1), encoding="utf-8")
+    except OSError:
+        pass
+    return result
+
+# === API de alto nivel: un video ===
+SUPPORTED_FORMATS = ["png", "jpg", "jpeg", "webp", "bmp", "tiff", "tif", "gif"]
+QUALITY_FORMATS = ("jpg", "jpeg", "webp")  # formatos que usan la calidad 2–31
+DEDUP_MODES = ("no", "mpdecimate", "phash")
+DHASH_W, DHASH_H = 17, 16  # rejilla del hash perceptual: 16 comparaciones por fila x 16 filas = 256 bits
+DHASH_LEVELS = 16  # bits por canal del color medio (código termómetro): dos frames lisos de distinto color no coinciden
+DHASH_BITS = (DHASH_W - 1) * DHASH_H + 3 * DHASH_LEVELS
+DEDUP_THRESHOLD = 6  # bits distintos (de DHASH_BITS) hasta los que dos frames cuentan como el mismo
+SINKS = ("carpeta", "tar", "zip", "pack")  # dónde acaban los frames: archivos sueltos o un único archivo
+SINK_EXT = {"tar": "tar", "zip": "zip", "pack": "vtfpack"}
+
+# === Varias salidas con una sola decodificación ===
+def parse_output_spec(txt: str) -> dict:
+    """"jpg:5@320" -> {"imgfmt": "jpg", "quality": 5, "scale": "320"}. La escala es un ancho ("320"),
+    un tamaño ("640x360") o un porcentaje ("50%"); la calidad es opcional (2 por defecto)."""
+    t = txt.strip().lower()
+    t, _, scale = t.partition("@")
+    imgfmt, _, q = t.partition(":")
+    imgfmt = imgfmt.strip()
+    if imgfmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato inválido en «{txt.strip()}». Formatos soportados: {', '.join(SUPPORTED_FORMATS)}")
+    try:
+        quality = int(q) if q.strip() else 2
+    except ValueError:
+        raise ValueError(f"Calidad inválida en «{txt.strip()}».") from None
+    if imgfmt in QUALITY_FORMATS and not (2 <= quality <= 31):
+        raise ValueError("La calidad debe ser un entero entre 2 y 31.")
+    scale = scale.strip() or None
+    if scale is not None and not re.fullmatch(r"\d+(x\d+)?|\d+(\.\d+)?%", scale):
+        raise ValueError(f"Escala inválida en «{txt.strip()}» (usa 320, 640x360 o 50%).")
+    return {"imgfmt": imgfmt, "quality": quality, "scale": scale}
+
+def scale_filter(scale: str) -> str:
+    if scale.endswith("%"):
+        f = float(scale[:-1]) / 100
+        return f"scale=trunc(iw*{f:g}/2)*2:-2"
+    w, _, h = scale.partition("x")
+    return f"scale={w}:{h or -2}"
+
+def multi_output_cmd(inp: Path, s_us: int, e_us: int, frame_sets: list[dict], cut: Path | None = None,
+                     fast_seek: bool = True, sample: str = "todos", sample_val: float | None = None,
+                     use_pts: bool = False, profile: str = "equilibrado", threads: int | None = None) -> list[str]:
+    """Un solo FFmpeg que decodifica una vez y reparte los frames (split) entre varias salidas:
+    cada frame set ({"outdir", "prefix", "imgfmt", "quality", "scale"}) y, opcionalmente, el recorte MP4.
+    El muestreo solo se aplica a los frame sets, nunca al recorte."""
+    if sample == "todos":
+        pre, post, _k = seek_args(inp, s_us, e_us, fast=fast_seek)
+        spre = []
+    else:  # como en extract_frames: seek exacto de entrada para que select/fps cuenten desde s
+        spre, _ = sample_args(sample, sample_val)
+        pre, post = ["-ss", us_to_arg(s_us)], ["-t", us_to_arg(e_us - s_us)]
+    if cut is not None and spre:
+        raise ValueError("El recorte no se puede combinar con el muestreo por keyframes en una sola pasada.")
+    n = len(frame_sets) + (cut is not None)
+    labels = [f"v{i}" for i in range(n)]
+    graph = [f"[0:v:0]split={n}" + "".join(f"[{lb}]" for lb in labels)]
+    _spre, spost = sample_args(sample, sample_val)
+    for i, fs in enumerate(frame_sets):
+        # escalar primero: el muestreo (select/fps) y el codificador trabajan ya con la imagen pequeña
+        chain = ([scale_filter(fs["scale"])] if fs.get("scale") else []) + ([spost[1]] if spost else [])
+        graph.append(f"[v{i}]{','.join(chain) or 'null'}[o{i}]")
+    cmd = ["ffmpeg","-hide_banner","-loglevel","error","-y", *thread_args(threads=threads), *spre, *pre, "-i", str(inp),
+           "-filter_complex", ";".join(graph)]
+    for i, fs in enumerate(frame_sets):
+        ext = EXT_MAP.get(fs["imgfmt"], fs["imgfmt"])
+        cmd += ["-map", f"[o{i}]", *post, "-vsync","0"] + (["-frame_pts","1"] if use_pts else [])
+        cmd += image_encoder_args(fs["imgfmt"], fs["quality"], profile) + [str((Path(fs["outdir"]) / f"{fs['prefix']}_%06d.{ext}").resolve())]
+    if cut is not None:
+        cmd += ["-map", f"[v{n - 1}]", "-map", f"0:{CUT_AUDIO}", *post, *x264_args(profile), "-c:a","aac","-b:a","192k", str(cut)]
+    return cmd
+
+# === Vista previa: miniaturas y hojas de contactos ===
+PREVIEW_BATCH = 60  # entradas (seeks) por proceso FFmpeg, como mucho
+PREVIEW_BATCH_PIXELS = 100_000_000  # píxeles de origen por proceso: cada entrada tiene su decodificador (~5 B/píxel)
+PREVIEW_JOBS = 4    # procesos FFmpeg de vista previa a la vez
+FRAME_CACHE_SIZE = 128  # fotogramas sueltos en memoria (~170 KB cada uno a 320 px)
+
+def preview_cmd(inp: Path, times_us: list[int], width: int, pattern: str, imgfmt: str = "jpg", quality: int = 4,
+                tile: tuple[int, int] | None = None) -> list[str]:
+    """Un FFmpeg que abre el video una vez por miniatura con seek a keyframe (-noaccurate_seek): solo se
+    decodifica un keyframe por miniatura, se escala nada más salir del decodificador y, si hay tile,
+    se juntan en hojas de cols x rows. Cada decodificador va con un solo hilo: solo decodifica un frame."""
+    cmd = ["ffmpeg","-hide_banner","-loglevel","error","-y"]
+    for t in times_us:
+        cmd += ["-threads","1","-skip_frame","nokey","-noaccurate_seek","-ss", us_to_arg(t), "-i", str(inp)]
+    graph = [f"[{i}:v:0]trim=end_frame=1,scale={width}:-2,setsar=1[t{i}]" for i in range(len(times_us))]
+    graph.append("".join(f"[t{i}]" for i in range(len(times_us))) + f"concat=n={len(times_us)}:v=1:a=0,setpts=N"
+                 + (f",tile={tile[0]}x{tile[1]}:padding=4:margin=4" if tile else "") + "[out]")
+    return cmd + ["-filter_complex", ";".join(graph), "-map","[out]", "-vsync","0",
+                  *image_encoder_args(imgfmt, quality), pattern]
+
+def make_previews(inp: Path, start: str | float = 0.0, end: str | float | None = None, outdir: Path = Path(DEFAULT_OUTDIR),
+                  count: int = 20, width: int = 320, sheet: bool = False, cols: int = 5, rows: int = 4,
+                  prefix: str = "preview", imgfmt: str = "jpg", quality: int = 4, log=lambda _t: None,
+                  job: JobController | None = None) -> dict:
+    """count miniaturas de width px repartidas por igual en [start, end] (el keyframe más cercano a cada
+    punto), sueltas o en hojas de contactos de cols x rows. No depende de la duración: un video de una
+    hora cuesta lo mismo que uno de un minuto. Devuelve input, status, files, seconds, error."""
+    inp, outdir, imgfmt = Path(inp), Path(outdir), imgfmt.lower()
+    if imgfmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato inválido. Formatos soportados: {', '.join(SUPPORTED_FORMATS)}")
+    if count < 1 or width < 16 or cols < 1 or rows < 1:
+        raise ValueError("count, cols y rows deben ser >= 1 y width >= 16.")
+    t_start = time.perf_counter()
+    result = {"input": str(inp), "status": "error", "files": [], "seconds": 0.0, "error": None}
+    s_us = to_us(start)
+    e_us = to_us(end) if end is not None else seconds_to_us(ffprobe_duration_seconds(inp) or 0.0)
+    if e_us <= s_us:
+        result["error"] = "El final debe ser posterior al inicio."; return result
+    step = (e_us - s_us) / count
+    times = [s_us + int(step * (i + 0.5)) for i in range(count)]
+    outdir.mkdir(parents=True, exist_ok=True)
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    vs = ffprobe_video_stream(inp) or {}
+    pixels = (vs.get("width") or 0) * (vs.get("height") or 0)
+    per = cols * rows if sheet else max(1, min(PREVIEW_BATCH, PREVIEW_BATCH_PIXELS // pixels if pixels else PREVIEW_BATCH))
+    batches = [times[i:i + per] for i in range(0, len(times), per)]
+    log(f"[INFO] Vista previa: {count} miniaturas de {width} px{f' en {len(batches)} hojas de {cols}x{rows}' if sheet else ''}…\n")
+
+    names = [f"{prefix}_sheet_{i + 1:03d}.{ext}" if sheet else f"{prefix}_b{i:03d}_%06d.{ext}" for i in range(len(batches))]
+
+    def run_batch(i: int) -> int:
+        batch, name = batches[i], names[i]
+        # una hoja con menos miniaturas que cols x rows se queda con las filas justas
+        tile = (cols, math.ceil(len(batch) / cols)) if sheet else None
+        cmd = preview_cmd(inp, batch, width, str((outdir / name).resolve()), imgfmt, quality, tile)
+        if sheet: cmd[-1:-1] = ["-frames:v","1", "-update","1"]
+        return run_ffmpeg(cmd, on_log=log, job=job)[0]
+
+    with ThreadPoolExecutor(max_workers=min(len(batches), PREVIEW_JOBS, os.cpu_count() or 1)) as pool:
+        rcs = list(pool.map(run_batch, range(len(batches))))
+    # solo lo que ha escrito esta ejecución (no restos de otra anterior con más miniaturas)
+    files = [outdir / name for name in names if (outdir / name).exists()] if sheet else []
+    if not sheet:  # numeración contigua: preview_000001... en el orden del video
+        for i in range(len(batches)):
+            for f in sorted(outdir.glob(f"{prefix}_b{i:03d}_*.{ext}")):
+                files.append(f.replace(outdir / f"{prefix}_{len(files) + 1:06d}.{ext}"))
+    result.update(files=[str(f) for f in files], seconds=round(time.perf_counter() - t_start, 3))
+    if job is not None and job.cancelled.is_set(): result["status"] = "cancelled"
+    elif any(rc != 0 for rc in rcs): result["error"] = "Falló la generación de la vista previa."
+    else:
+        result["status"] = "ok"
+        log(f"[✅] Vista previa: {len(files)} archivos en {outdir.resolve()} ({result['seconds']:.2f} s)\n")
+    return result
+
+def grab_frame(inp: Path, t_us: int, width: int = 320, exact: bool = True) -> bytes | None:
+    """Un solo frame en t_us como PPM (lo abre tk.PhotoImage sin dependencias), reducido a width px.
+    exact=False devuelve el keyframe anterior y solo decodifica ese frame; exact=True decodifica desde
+    ese keyframe hasta t_us (como mucho un GOP)."""
+    pre = ["-noaccurate_seek","-skip_frame","nokey"] if not exact else []
+    cmd = ["ffmpeg","-hide_banner","-loglevel","error","-nostdin", *pre, "-ss", us_to_arg(max(0, t_us)), "-i", str(inp),
+           "-frames:v","1", "-vf", f"scale={width}:-2", "-f","image2pipe", "-c:v","ppm", "pipe:1"]
+    try:
+        out = subprocess.run(cmd, capture_output=True, timeout=30).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out or None
+
+class FrameCache:
+    """Caché LRU en memoria de grab_frame, para recorrer un video con los sliders sin repetir decodificaciones.
+    La clave incluye tamaño y fecha del archivo, así que un video reescrito no devuelve frames viejos."""
+    def __init__(self, size: int = FRAME_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()
+
+    def get(self, inp: Path, t_us: int, width: int = 320, exact: bool = True) -> bytes | None:
+        key = (ProbeCache.key(inp), t_us, width, exact)
+        with self._lock:
+            if key in self._frames:
+                self._frames.move_to_end(key); return self._frames[key]
+        data = grab_frame(inp, t_us, width, exact)
+        if data is not None and key[0] is not None:
+            with self._lock:
+                self._frames[key] = data
+                while len(self._frames) > self.size: self._frames.popitem(last=False)
+        return data
+
+def _frame_files(outdir: Path, prefix: str, ext: str) -> list[Path]:
+    """Frames de un frame set: exactamente <prefix>_<número>.<ext>. Con rangos que comparten carpeta,
+    "frame_a" no debe llevarse los de "frame_a_b" (frame_a_b_000001...)."""
+    rx = re.compile(rf"{re.escape(prefix)}_\d+\.{re.escape(ext)}")
+    return [f for f in outdir.iterdir() if rx.fullmatch(f.name) and f.is_file()]
+
+def to_us(t: str | float) -> int:
+    """Convierte "HH:MM:SS.mmm", "12.5" o un número de segundos a µs."""
+    return seconds_to_us(hhmmss_ms_to_seconds(t) if isinstance(t, str) else float(t))
+
+def extract_frames(inp: Path, start: str | float = 0.0, end: str | float | None = None, outdir: Path = Path(DEFAULT_OUTDIR),
+                   prefix: str = "frame", imgfmt: str = "png", quality: int = 2, use_pts: bool = False,
+                   fast_seek: bool = True, workers: int = 1, cut: Path | None = None, cut_mode: str = "exacto",
+                   sample: str = "todos", sample_val: float | None = None, outputs: list[dict] | None = None,
+                   profile: str = "equilibrado", threads: int | None = None, scale: str | None = None,
+                   dedup: str = "no", dedup_threshold: int = DEDUP_THRESHOLD, sink: str = "carpeta",
+                   keep_partial: bool = False, log=lambda _t: None, on_progress=None,
+                   job: JobController | None = None) -> dict:
+    """Recorte opcional a MP4 + extracción de frames nativos de [start, end].
+
+    start/end aceptan "HH:MM:SS.mmm" o segundos; end=None llega hasta el final del video.
+    sample elige qué frames se guardan (SAMPLE_MODES) y sample_val es su N / fps / umbral.
+    outputs son frame sets extra (ver parse_output_spec; outdir por defecto outdir/<fmt>[_<escala>]).
+    profile es el perfil de rendimiento (PROFILES, o "auto" para medirlo con autotune); threads fija
+    los hilos por proceso (por defecto, los núcleos repartidos entre los workers).
+    scale ("320", "640x360", "50%") reduce los frames principales nada más decodificarlos.
+    dedup ("mpdecimate" o "phash", ver dedup_extract) no guarda frames repetidos y deja un índice.
+    sink "tar", "zip" o "pack" escribe los frames en outdir/<prefix>.<tar|zip|vtfpack> en vez de sueltos.
+    Con outputs, o con recorte exacto y un solo worker, todo sale de una única decodificación.
+    on_progress(etapa, stats) recibe el progreso de cada etapa ("Recorte", "Frames").
+    Devuelve un resumen: input, status (ok|error|cancelled), frames, seconds, cut, outputs, error."""
+    inp, outdir = Path(inp), Path(outdir)
+    imgfmt = imgfmt.lower()
+    if imgfmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato inválido. Formatos soportados: {', '.join(SUPPORTED_FORMATS)}")
+    if imgfmt in QUALITY_FORMATS and not (2 <= quality <= 31):
+        raise ValueError("La calidad debe ser un entero entre 2 y 31.")
+    if cut is not None and cut_mode not in CUT_MODES:
+        raise ValueError(f"Modo de recorte inválido. Modos: {', '.join(CUT_MODES)}")
+    if workers < 1:
+        raise ValueError("workers debe ser mayor o igual a 1.")
+    if profile not in PROFILES + ("auto",):
+        raise ValueError(f"Perfil inválido. Perfiles: {', '.join(PROFILES)}, auto")
+    sample_val = sample_value(sample, sample_val)
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"Deduplicación inválida. Modos: {', '.join(DEDUP_MODES)}")
+    if dedup != "no" and (outputs or use_pts):
+        raise ValueError("La deduplicación no admite salidas extra ni nombres por PTS.")
+    if not 0 <= dedup_threshold <= DHASH_BITS:
+        raise ValueError(f"El umbral de deduplicación debe estar entre 0 y {DHASH_BITS} bits.")
+    if sink not in SINKS:
+        raise ValueError(f"Salida inválida. Opciones: {', '.join(SINKS)}")
+    if sink != "carpeta" and (outputs or use_pts or dedup != "no"):
+        raise ValueError("La salida a tar/zip/pack no admite salidas extra, nombres por PTS ni deduplicación.")
+    if sink != "carpeta" and imgfmt not in PIPE_CODECS:
+        raise ValueError(f"La salida a tar/zip/pack admite: {', '.join(PIPE_CODECS)}")
+
+    if scale is not None: scale = parse_output_spec(f"{imgfmt}@{scale}")["scale"]  # valida
+    frame_sets = [dict(outdir=outdir, prefix=prefix, imgfmt=imgfmt, quality=quality, scale=scale)]
+    for fs in outputs or []:
+        name = EXT_MAP.get(fs["imgfmt"], fs["imgfmt"]) + (f"_{fs['scale'].rstrip('%')}" if fs.get("scale") else "")
+        frame_sets.append(dict(fs, outdir=Path(fs.get("outdir") or outdir / name), prefix=fs.get("prefix", prefix)))
+    # keyframes usa -skip_frame nokey en la entrada: el recorte tiene que ir aparte
+    cut_in_pass = (cut is not None and cut_mode == "exacto" and sample != "keyframes" and dedup == "no"
+                   and sink == "carpeta" and (workers == 1 or len(frame_sets) > 1))
+    single_pass = dedup == "no" and sink == "carpeta" and (len(frame_sets) > 1 or cut_in_pass or scale is not None)
+
+    result = {"input": str(inp), "status": "error", "frames": 0, "seconds": 0.0, "cut": None, "outputs": [], "archive": None,
+              "timings": {}, "error": None}
+    t_start = time.perf_counter(); wall_start = time.time()
+    timings = result["timings"]  # segundos por etapa: probe, seek, autotune, recorte, frames, cierre
+    def lap(stage: str, t0: float) -> float:
+        now = time.perf_counter()
+        timings[stage] = round(timings.get(stage, 0.0) + now - t0, 3); return now
+    def fail(msg: str) -> dict:
+        log(f"[ERROR] {msg}\n")
+        result.update(error=msg, seconds=round(time.perf_counter() - t_start, 3)); return result
+
+    if not inp.exists():
+        return fail("El archivo de entrada no existe.")
+    t0 = time.perf_counter()
+    s_us = to_us(start)
+    if end is None:
+        secs = ffprobe_duration_seconds(inp)
+        if secs is None: return fail("No se pudo leer la duración del video.")
+        e_us = seconds_to_us(secs)
+    else:
+        e_us = to_us(end)
+    if e_us <= s_us:
+        return fail("El final debe ser posterior al inicio.")
+    for fs in frame_sets: fs["outdir"].mkdir(parents=True, exist_ok=True)
+    existing = {fs["outdir"]: set(fs["outdir"].iterdir()) for fs in frame_sets}  # para borrar solo lo de este trabajo si se cancela
+    stage_progress = (lambda stage: (lambda st: on_progress(stage, st))) if on_progress else (lambda _stage: None)
+
+    t0 = lap("probe", t0)
+
+    # Frames nativos: rango ajustado a la rejilla de frames una sola vez, uno o varios workers dan lo mismo
+    fs_us, fe_us = snap_range(inp, s_us, e_us) if sample == "todos" else (s_us, e_us)
+    # Seek: input-seek al keyframe previo + recorte exacto (o el camino lento de siempre)
+    pre, post, k = seek_args(inp, fs_us, fe_us, fast=fast_seek)
+    if k is not None:
+        log(f"[INFO] Seek rápido desde keyframe en {seconds_to_hhmmss_ms(k/1_000_000)}\n")
+    t0 = lap("seek", t0)
+    if profile == "auto":
+        tuned = autotune(inp, s_us, imgfmt, quality, workers, log=log)
+        profile, threads = tuned["profile"], threads or tuned["threads"]
+        log(f"[INFO] Auto-ajuste: perfil {profile}, {threads} hilos ({tuned['fps']:.0f} frames/s en la prueba)\n")
+        t0 = lap("autotune", t0)
+    est = estimate_frames(inp, s_us, e_us, sample, sample_val)
+    log(f"[INFO] Frames estimados: {'~' + str(est) if est is not None else 'desconocido (depende del contenido)'}\n")
+    lap("probe", t0)
+
+    # (Opcional) recorte a MP4 con precisión por cuadro (si no sale de la misma pasada que los frames)
+    if cut is not None and not cut_in_pass:
+        cut = Path(cut)
+        log(f"[INFO] Cortando fragmento de video (modo {cut_mode})…\n")
+        t0 = time.perf_counter()
+        if cut_mode == "rápido":
+            rc,_out = smart_cut(inp, s_us, e_us, cut, log=log, on_progress=stage_progress("Recorte"), job=job, profile=profile)
+        else:
+            rc,_out = run_ffmpeg(cut_exact_cmd(inp, s_us, e_us, cut, fast_seek=fast_seek, profile=profile, threads=threads),
+                                 on_progress=stage_progress("Recorte"), on_log=log, job=job)
+        dt = time.perf_counter() - t0
+        lap("recorte", t0)
+        if rc == CANCELLED_RC:
+            if not keep_partial: cut.unlink(missing_ok=True)
+            log(f"[INFO] Recorte cancelado{' (parcial conservado)' if keep_partial else ''}.\n")
+            result.update(status="cancelled", seconds=round(time.perf_counter() - t_start, 3)); return result
+        if rc != 0:
+            return fail("Falló el recorte.")
+        log(f"[OK] Recorte ({cut_mode}, {dt:.2f} s): {cut}\n")
+        result["cut"] = str(cut)
+
+    # Extracción de frames nativos (sin cambiar FPS)
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    pattern = str((outdir / f"{prefix}_%06d.{ext}").resolve())
+    enc_args = image_encoder_args(imgfmt, quality, profile)
+    t_frames = time.perf_counter()
+    if dedup != "no":
+        log(f"[INFO] Extrayendo frames sin repetidos ({dedup}) en formato {imgfmt.upper()}…\n")
+        if workers > 1: log("[INFO] La deduplicación usa un solo proceso FFmpeg (compara cada frame con el anterior).\n")
+        rc = dedup_extract(inp, s_us, e_us, outdir, prefix, imgfmt, enc_args, dedup, dedup_threshold, sample, sample_val,
+                           scale, keep_partial, log=log, job=job)
+    elif sink != "carpeta":
+        archive = outdir / f"{prefix}.{SINK_EXT[sink]}"
+        log(f"[INFO] Extrayendo frames en formato {imgfmt.upper()} directamente a {archive.name}…\n")
+        if workers > 1: log("[INFO] La salida a un único archivo usa un solo proceso FFmpeg.\n")
+        spre, spost = sample_args(sample, sample_val)
+        filters = ([scale_filter(scale)] if scale else []) + ([spost[1]] if spost else [])
+        # con muestreo, input-seek exacto a s (igual que en el camino de muestreo con archivos sueltos)
+        src = [*pre, "-i", str(inp), *post] if sample == "todos" else [*spre, "-ss", us_to_arg(s_us), "-i", str(inp), "-t", us_to_arg(e_us - s_us)]
+        sink_cmd = ["ffmpeg","-hide_banner","-loglevel","error", *thread_args(threads=threads), *src,
+                    *(["-vf", ",".join(filters)] if filters else []), "-vsync","0", "-c:v", PIPE_CODECS[imgfmt], *enc_args,
+                    "-f","image2pipe", "pipe:1"]
+        rc, sink_frames = extract_to_sink(sink_cmd, imgfmt, sink, archive, prefix, on_progress=stage_progress("Frames"), log=log, job=job)
+        if rc == CANCELLED_RC and not keep_partial: archive.unlink(missing_ok=True)
+        elif rc == 0: result["archive"] = str(archive)
+    elif single_pass:
+        cut = Path(cut) if cut_in_pass else None
+        names = ", ".join(f"{fs['imgfmt'].upper()}{' @' + fs['scale'] if fs.get('scale') else ''}" for fs in frame_sets)
+        log(f"[INFO] Una sola decodificación → {names}{' + recorte MP4' if cut else ''}\n")
+        if workers > 1: log("[INFO] Varias salidas en una pasada usan un solo proceso FFmpeg.\n")
+        cmd = multi_output_cmd(inp, s_us, e_us, frame_sets, cut=cut, fast_seek=fast_seek, sample=sample,
+                               sample_val=sample_val, use_pts=use_pts, profile=profile, threads=threads)
+        t0 = time.perf_counter()
+        rc,_out = run_ffmpeg(cmd, on_progress=stage_progress("Frames + recorte" if cut else "Frames"), on_log=log, job=job)
+        if cut is not None:
+            if rc == CANCELLED_RC and not keep_partial: cut.unlink(missing_ok=True)
+            elif rc == 0:
+                log(f"[OK] Recorte (exacto, misma pasada, {time.perf_counter() - t0:.2f} s): {cut}\n")
+                result["cut"] = str(cut)
+    elif sample != "todos":
+        log(f"[INFO] Extrayendo frames ({sample}{f' {sample_val:g}' if sample_val is not None else ''}) en formato {imgfmt.upper()}…\n")
+        if workers > 1: log("[INFO] El muestreo usa un solo proceso FFmpeg (la numeración depende de todo el rango).\n")
+        # input-seek exacto a s: los filtros (select n, fps) cuentan desde el primer frame del rango
+        spre, spost = sample_args(sample, sample_val)
+        extract_cmd = ["ffmpeg","-hide_banner","-loglevel","error", *thread_args(threads=threads), *spre, "-ss", us_to_arg(s_us), "-i", str(inp),
+                       "-t", us_to_arg(e_us - s_us), *spost, "-vsync","0"]
+        if use_pts: extract_cmd += ["-frame_pts","1"]
+        extract_cmd += enc_args + [pattern]
+        rc,_out = run_ffmpeg(extract_cmd, on_progress=stage_progress("Frames"), on_log=log, job=job)
+    elif workers > 1:
+        log(f"[INFO] Extrayendo frames nativos en formato {imgfmt.upper()}…\n")
+        rc,_out = extract_parallel(inp, fs_us, fe_us, outdir, prefix, imgfmt, enc_args, use_pts, workers,
+                                   log=log, on_progress=stage_progress("Frames"), job=job, keep_partial=keep_partial, threads=threads)
+    else:
+        log(f"[INFO] Extrayendo frames nativos en formato {imgfmt.upper()}…\n")
+        extract_cmd = ["ffmpeg","-hide_banner","-loglevel","error", *thread_args(threads=threads), *pre, "-i",str(inp), *post, "-vsync","0"]
+        if use_pts: extract_cmd += ["-frame_pts","1"]
+        extract_cmd += enc_args + [pattern]
+        rc,_out = run_ffmpeg(extract_cmd, on_progress=stage_progress("Frames"), on_log=log, job=job)
+    # decodificar, codificar y escribir van solapados dentro de FFmpeg: se miden juntos
+    t0 = lap("frames + recorte" if cut_in_pass else "frames", t_frames)
+    if rc == CANCELLED_RC:
+        if not keep_partial:
+            for fs in frame_sets:
+                for f in set(_frame_files(fs["outdir"], fs["prefix"], EXT_MAP.get(fs["imgfmt"], fs["imgfmt"]))) - existing[fs["outdir"]]:
+                    f.unlink(missing_ok=True)
+        log(f"[INFO] Extracción cancelada{' (frames parciales conservados)' if keep_partial else '; frames parciales eliminados'}.\n")
+        result["status"] = "cancelled"
+    elif rc != 0:
+        fail("Falló la extracción de frames.")
+    else:
+        log(f"[✅] Frames extraídos exitosamente en: {outdir.resolve()}\n")
+        result["status"] = "ok"
+    for fs in frame_sets:
+        fext = EXT_MAP.get(fs["imgfmt"], fs["imgfmt"])
+        if sink != "carpeta": n = sink_frames
+        else: n = sum(1 for f in _frame_files(fs["outdir"], fs["prefix"], fext) if f.stat().st_mtime >= wall_start - 1)
+        result["outputs"].append({"outdir": str(fs["outdir"]), "imgfmt": fs["imgfmt"], "scale": fs.get("scale"), "frames": n})
+    result["frames"] = result["outputs"][0]["frames"]
+    lap("cierre", t0)
+    result["seconds"] = round(time.perf_counter() - t_start, 3)
+    log(f"[INFO] Tiempos: {format_timings(timings)} · total {result['seconds']:.2f} s\n")
+    return result
+
+def format_timings(timings: dict) -> str:
+    return " · ".join(f"{stage} {secs:.2f} s" for stage, secs in timings.items())
+
+# === Frames en memoria (rawvideo por pipe, sin pasar por disco) ===
+SHOWINFO_RE = re.compile(r"\bn:\s*\d+\s+pts:\s*-?\d+\s+pts_time:(\S+).*?\ss:(\d+)x(\d+)")
+
+def _numpy():
+    """NumPy si está instalado, o None (entonces se entregan memoryview). Se importa al primer uso y no al
+    importar el motor: cuesta ~100 ms y solo lo usan iter_frames/_raw_frames."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _raw_frames(inp: Path, s_us: int, e_us: int, pre: list[str], filters: list[str], job: JobController | None = None):
+    """Decodifica [s_us, e_us) a RGB24 por un pipe y genera (pts relativo, ancho, alto, memoryview, frame).
+    El memoryview y el frame (array NumPy o el mismo memoryview) apuntan a un único buffer reutilizado."""
+    # showinfo escribe en stderr el pts y el tamaño de cada frame antes de que llegue al pipe
+    cmd = ["ffmpeg","-hide_banner","-nostats","-loglevel","info", *pre, "-ss", us_to_arg(s_us), "-i", str(inp),
+           "-t", us_to_arg(e_us - s_us), "-map","0:v:0", "-vf", ",".join(filters + ["showinfo"]), "-vsync","0",
+           "-f","rawvideo", "-pix_fmt","rgb24", "pipe:1"]
+    if job is not None and job.cancelled.is_set(): return
+    np = _numpy()
+    p = subprocess.Popen(cmd, stdin=subprocess.PIPE if job is not None else subprocess.DEVNULL,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    if job is not None and not job.register(p):
+        p.kill(); p.wait(); return
+    infos = queue.Queue(maxsize=64)  # FFmpeg se bloquea en el pipe de video, así que nunca se adelanta mucho
+    tail = deque(maxlen=LOG_TAIL_LINES)
+
+    def pump_stderr():
+        # bufsize=0 es solo para readinto de stdout; stderr se lee por líneas con buffer (no byte a byte)
+        for raw in io.BufferedReader(p.stderr):
+            line = raw.decode("utf-8", "replace")
+            m = SHOWINFO_RE.search(line)
+            if m: infos.put((float(m.group(1)), int(m.group(2)), int(m.group(3))))
+            else: tail.append(line)
+        infos.put(None)
+
+    t = threading.Thread(target=pump_stderr, daemon=True); t.start()
+    buf, view, shape = None, None, None
+    try:
+        while True:
+            info = infos.get()
+            if info is None or (job is not None and job.cancelled.is_set()): break
+            pts, w, h = info
+            if (h, w) != shape:  # solo cambia si cambia la resolución a mitad del video
+                shape = (h, w)
+                buf = bytearray(w * h * 3)
+                view = memoryview(buf)
+                arr = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 3) if np is not None else view
+            got = 0
+            while got < len(buf):
+                n = p.stdout.readinto(view[got:])
+                if not n: break
+                got += n
+            if got < len(buf): break  # FFmpeg terminó (o se canceló) a mitad de frame
+            yield pts, w, h, view, arr
+        rc = p.wait()
+    finally:
+        if p.poll() is None:
+            p.kill(); p.wait()
+        while t.is_alive():  # vaciar la cola para que el lector de stderr no quede bloqueado
+            try: infos.get(timeout=0.1)
+            except queue.Empty: pass
+        if job is not None: job.unregister(p)
+    if rc != 0 and not (job is not None and job.cancelled.is_set()):
+        raise RuntimeError(f"FFmpeg terminó con código {rc}:\n{''.join(list(tail)[-10:])}")
+
+def _range_us(inp: Path, start: str | float, end: str | float | None) -> tuple[int, int]:
+    s_us = to_us(start)
+    if end is None:
+        secs = ffprobe_duration_seconds(inp)
+        if secs is None: raise ValueError(f"No se pudo leer la duración de {inp}")
+        e_us = seconds_to_us(secs)
+    else:
+        e_us = to_us(end)
+    if e_us <= s_us:
+        raise ValueError("El final debe ser posterior al inicio.")
+    return s_us, e_us
+
+def iter_frames(inp: Path, start: str | float = 0.0, end: str | float | None = None, sample: str = "todos",
+                sample_val: float | None = None, copy: bool = False, job: JobController | None = None):
+    """Genera (pts, frame) de [start, end] decodificando a RGB24 por un pipe, sin escribir imágenes.
+
+    pts está en segundos desde el inicio del archivo. frame es un array NumPy (alto, ancho, 3) uint8,
+    o un memoryview de alto*ancho*3 bytes si NumPy no está instalado. El frame es una vista sobre un
+    único buffer que se reutiliza: solo es válido hasta la siguiente iteración (copy=True entrega copias).
+    La memoria no depende de la duración: un frame en el buffer más lo que quepa en el pipe.
+    Acepta los mismos modos de muestreo que extract_frames. Cerrar el generador detiene FFmpeg."""
+    inp = Path(inp)
+    sample_val = sample_value(sample, sample_val)
+    s_us, e_us = _range_us(inp, start, end)
+    spre, spost = sample_args(sample, sample_val)
+    np = _numpy()
+    for pts, _w, _h, view, arr in _raw_frames(inp, s_us, e_us, spre, [spost[1]] if spost else [], job):
+        frame = (arr.copy() if np is not None else bytes(view)) if copy else arr
+        yield s_us / 1_000_000 + pts, frame
+
+# === Deduplicación: hash perceptual e índice junto a los frames ===
+
+# FFmpeg reduce cada frame a DHASH_W x DHASH_H por área (cada píxel es la media exacta de su celda) y pega
+# esa miniatura debajo del frame, así que llega por el mismo pipe y Python no recorre millones de píxeles.
+# La rejilla de 9x8 del dHash clásico no distingue dos líneas de texto distintas en una diapositiva.
+DHASH_GRAPH = (f"split[vtf_f][vtf_h];[vtf_f]format=rgb24[vtf_fr];[vtf_h]scale={DHASH_W}:{DHASH_H}:flags=area,format=rgb24[vtf_t];"
+               "[vtf_fr][vtf_t]xstack=inputs=2:layout=0_0|0_h0:fill=black")
+
+def dhash(thumb) -> int:
+    """Hash de DHASH_BITS bits de una miniatura RGB24 de DHASH_W x DHASH_H (la media de cada celda del
+    frame): un bit por cada par de celdas vecinas en horizontal (luminancia R+2G+B, el dHash) y el color
+    medio de cada canal en código termómetro, donde cada nivel de diferencia es un bit distinto. Sin esto
+    último todo frame liso (negro, blanco, un color, un fundido) tendría el mismo hash: 0."""
+    n = DHASH_W * DHASH_H
+    lum = [thumb[i] + 2 * thumb[i + 1] + thumb[i + 2] for i in range(0, n * 3, 3)]
+    bits = 0
+    for y in range(0, len(lum), DHASH_W):
+        for a, b in zip(lum[y:y + DHASH_W - 1], lum[y + 1:y + DHASH_W]):
+            bits = bits << 1 | (a > b)
+    for c in range(3):
+        level = sum(thumb[c:n * 3:3]) * (DHASH_LEVELS + 1) // (n * 256)  # 0..DHASH_LEVELS
+        bits = bits << DHASH_LEVELS | ((1 << level) - 1)
+    return bits
+
+def read_dedup_index(path: Path) -> list[dict]:
+    """Filas del índice (n, pts, hash, kept, file); lista vacía si no existe."""
+    rows = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#") or not line.strip(): continue
+                n, pts, h, kept, name = line.rstrip("\n").split("\t")
+                # hash de otro tamaño (índices de versiones anteriores): no se compara
+                rows.append({"n": int(n), "pts": float(pts), "hash": int(h, 16) if len(h) == DHASH_BITS // 4 else None, "kept": kept == "1",
+                             "file": None if name == "-" else name})
+    except OSError:
+        pass
+    return rows
+
+def _write_dedup_index(path: Path, rows: list[dict]):
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("# n\tpts\thash\tkept\tfile\n")
+        for r in rows:
+            f.write(f"{r['n']}\t{r['pts']:.6f}\t{'-' if r['hash'] is None else format(r['hash'], f'0{DHASH_BITS // 4}x')}\t{int(r['kept'])}\t{r['file'] or '-'}\n")
+    os.replace(tmp, path)
+
+def dedup_extract(inp: Path, s_us: int, e_us: int, outdir: Path, prefix: str, imgfmt: str, enc_args: list[str],
+                  mode: str = "phash", threshold: int = DEDUP_THRESHOLD, sample: str = "todos", sample_val: float | None = None,
+                  scale: str | None = None, keep_partial: bool = False, log=lambda _t: None, job: JobController | None = None) -> int:
+    """Extrae [s_us, e_us) sin guardar frames repetidos. Los frames se decodifican por un pipe, se les calcula
+    el dHash y solo los que se conservan pasan a un segundo FFmpeg que los codifica: los repetidos no se
+    codifican ni se escriben. phash descarta un frame si difiere en <= threshold bits del último guardado;
+    mpdecimate deja que FFmpeg los descarte antes del pipe (y el índice solo lista los que pasan).
+    De un índice anterior se saltan los frames con el mismo pts, así que repetir o ampliar un rango solo
+    añade frames nuevos; en phash el "último guardado" es el anterior en el video, de esta pasada o de otra. El índice <prefix>_index.tsv queda junto a los frames.
+    Devuelve el código de salida como run_ffmpeg (CANCELLED_RC si se canceló)."""
+    index_path = outdir / f"{prefix}_index.tsv"
+    old = read_dedup_index(index_path)
+    seen_pts = {round(r["pts"], 3) for r in old}
+    old_kept = sorted((r["pts"], r["hash"]) for r in old if r["kept"] and r["hash"] is not None)
+    old_kept_pts = [pts for pts, _h in old_kept]
+    next_num = 1 + max((int(r["file"].rsplit("_", 1)[1].split(".")[0]) for r in old if r["file"]), default=0)
+    if old: log(f"[INFO] Índice previo: {len(old)} frames ya vistos; se continúa desde {prefix}_{next_num:06d}\n")
+    spre, spost = sample_args(sample, sample_val)
+    filters = ([scale_filter(scale)] if scale else []) + ([spost[1]] if spost else []) + (["mpdecimate"] if mode == "mpdecimate" else []) \
+        + [DHASH_GRAPH]
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    rows, last, enc, enc_shape, kept = [], None, None, None, 0
+    written = []  # archivos de esta pasada (se borran si se cancela sin keep_partial)
+
+    def start_encoder(w: int, h: int):
+        cmd = ["ffmpeg","-hide_banner","-loglevel","error","-f","rawvideo","-pix_fmt","rgb24","-s",f"{w}x{h}",
+               "-i","pipe:0", *enc_args, "-start_number", str(next_num + kept), str((outdir / f"{prefix}_%06d.{ext}").resolve())]
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if job is not None: job.register(p, quit=False)  # su stdin son los frames
+        return p
+
+    def stop_encoder(p) -> int:
+        try: p.stdin.close()
+        except OSError: pass
+        err = p.stderr.read().decode("utf-8", "replace"); rc = p.wait()
+        if job is not None: job.unregister(p)
+        if err.strip(): log(err if err.endswith("\n") else err + "\n")
+        return rc
+
+    rc = 0
+    try:
+        for n, (pts, w, h, view, _arr) in enumerate(_raw_frames(inp, s_us, e_us, spre, filters, job), start=1):
+            pts = s_us / 1_000_000 + pts
+            if round(pts, 3) in seen_pts: continue
+            h -= DHASH_H  # las últimas filas traen la miniatura del hash
+            size = w * h * 3
+            hsh = dhash(b"".join(view[size + r * w * 3:size + r * w * 3 + DHASH_W * 3] for r in range(DHASH_H)))
+            dup = False
+            if mode == "phash":
+                ref, i = last, bisect.bisect_left(old_kept_pts, pts)
+                if i and (ref is None or old_kept[i - 1][0] > ref[0]): ref = old_kept[i - 1]
+                dup = ref is not None and bin(hsh ^ ref[1]).count("1") <= threshold
+            name = None
+            if not dup:
+                if enc_shape != (w, h):  # un encoder por resolución (normalmente uno solo)
+                    if enc is not None and stop_encoder(enc) != 0: rc = 1; break
+                    enc, enc_shape = start_encoder(w, h), (w, h)
+                try:
+                    enc.stdin.write(view[:size])
+                except (BrokenPipeError, OSError):
+                    rc = 1; break
+                name = f"{prefix}_{next_num + kept:06d}.{ext}"
+                written.append(outdir / name)
+                kept += 1; last = (pts, hsh)
+            rows.append({"n": n, "pts": pts, "hash": hsh, "kept": not dup, "file": name})
+    except RuntimeError as e:
+        log(f"[ERROR] {e}\n"); rc = 1
+    finally:
+        if enc is not None and stop_encoder(enc) != 0 and rc == 0: rc = 1
+    cancelled = job is not None and job.cancelled.is_set()
+    if cancelled and not keep_partial:
+        for f in written: f.unlink(missing_ok=True)
+        return CANCELLED_RC
+    _write_dedup_index(index_path, old + rows)
+    dropped = sum(1 for r in rows if not r["kept"])
+    log(f"[INFO] Deduplicación ({mode}): {kept} frames guardados, {dropped} descartados{' (mpdecimate descarta además antes del pipe)' if mode == 'mpdecimate' else ''}; índice en {index_path}\n")
+    return CANCELLED_RC if cancelled else rc
+
+# === Salida a un único archivo: tar, zip o pack (sin archivos sueltos intermedios) ===
+# FFmpeg escribe las imágenes seguidas por stdout (image2pipe); se separan leyendo la estructura de
+# cada formato y se añaden al archivo según llegan. TIFF y GIF no se pueden separar así.
+PIPE_CODECS = {"png": "png", "jpg": "mjpeg", "jpeg": "mjpeg", "bmp": "bmp", "webp": "libwebp"}
+PACK_MAGIC = b"VTFPACK1"
+PACK_FOOTER = struct.Struct("<QQI")  # offset del índice, nº de frames, bytes de metadatos (+ PACK_MAGIC)
+
+class _PipeReader:
+    """Lectura con buffer propio: permite buscar un marcador sin consumir lo que viene detrás."""
+    def __init__(self, f, chunk: int = 1 << 20):
+        self.f, self.chunk, self.buf = f, chunk, bytearray()
+
+    def _fill(self) -> bool:
+        data = getattr(self.f, "read1", self.f.read)(self.chunk)
+        self.buf += data
+        return bool(data)
+
+    def read(self, n: int) -> bytes:
+        while len(self.buf) < n and self._fill(): pass
+        out = bytes(self.buf[:n]); del self.buf[:n]
+        return out
+
+    def read_until(self, token: bytes) -> bytes:
+        pos = 0
+        while (i := self.buf.find(token, pos)) < 0:
+            pos = max(0, len(self.buf) - len(token) + 1)
+            if not self._fill(): return self.read(len(self.buf))
+        return self.read(i + len(token))
+
+def split_images(f, imgfmt: str):
+    """Genera los bytes de cada imagen de un flujo image2pipe (png, jpg, bmp o webp).
+    Los trozos de cada imagen se juntan una sola vez al final (el PNG de FFmpeg va en IDAT de 4 KiB)."""
+    r, kind = _PipeReader(f), EXT_MAP.get(imgfmt, imgfmt)
+    while True:
+        if kind == "png":
+            parts = [r.read(8)]
+            if len(parts[0]) < 8: return
+            while True:
+                head = r.read(8)
+                if len(head) < 8: return
+                parts += (head, r.read(int.from_bytes(head[:4], "big") + 4))
+                if head[4:] == b"IEND": break
+            img = b"".join(parts)
+        elif kind == "jpg":
+            parts = [r.read(2)]
+            if len(parts[0]) < 2: return
+            while True:  # segmentos con longitud hasta SOS; después, datos hasta EOI (0xFF va escapado)
+                marker = r.read(4)
+                if len(marker) < 4: return
+                parts += (marker, r.read(int.from_bytes(marker[2:], "big") - 2))
+                if marker[1] == 0xDA:
+                    parts.append(r.read_until(b"\xff\xd9")); break
+            img = b"".join(parts)
+        elif kind in ("bmp", "webp"):
+            head = r.read(8)
+            if len(head) < 8: return
+            size = int.from_bytes(head[2:6], "little") if kind == "bmp" else int.from_bytes(head[4:8], "little") + 8
+            img = head + r.read(size - 8)
+        else:
+            raise ValueError(f"El formato {imgfmt} no se puede escribir en un archivo tar/zip/pack.")
+        yield img
+
+class TarSink:
+    """tar sin comprimir escrito en streaming (modo "w|": nunca vuelve atrás en el archivo)."""
+    def __init__(self, path: Path):
+        self.tar = tarfile.open(path, "w|")
+
+    def add(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name); info.size = len(data); info.mtime = int(time.time())
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self.tar.close()
+
+class ZipSink:
+    """zip sin compresión (las imágenes ya van comprimidas): solo empaqueta."""
+    def __init__(self, path: Path):
+        self.zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+
+    def add(self, name: str, data: bytes):
+        self.zip.writestr(name, data)
+
+    def close(self):
+        self.zip.close()
+
+class PackSink:
+    """Un solo archivo: PACK_MAGIC, las imágenes seguidas, un índice (offset, tamaño) por frame, metadatos
+    JSON y un pie fijo. Se lee con PackReader, con acceso aleatorio por número de frame."""
+    def __init__(self, path: Path):
+        self.f = open(path, "wb"); self.f.write(PACK_MAGIC)
+        self.index, self.names = [], []
+
+    def add(self, name: str, data: bytes):
+        self.index.append((self.f.tell(), len(data))); self.names.append(name)
+        self.f.write(data)
+
+    def close(self):
+        index_at = self.f.tell()
+        for off, size in self.index: self.f.write(struct.pack("<QQ", off, size))
+        meta = json.dumps({"names": self.names}).encode("utf-8")
+        self.f.write(meta + PACK_FOOTER.pack(index_at, len(self.index), len(meta)) + PACK_MAGIC)
+        self.f.close()
+
+SINK_CLASSES = {"tar": TarSink, "zip": ZipSink, "pack": PackSink}
+
+class PackReader:
+    """Lee un .vtfpack con mmap: pack[i] son los bytes del frame i (0 = primero), sin leer el resto.
+    pack.get(n) usa el número del nombre (frame_000001 -> 1); pack.names da los nombres originales."""
+    def __init__(self, path: str | Path):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = PACK_FOOTER.size + len(PACK_MAGIC)
+        if self._mm[:len(PACK_MAGIC)] != PACK_MAGIC or self._mm[-len(PACK_MAGIC):] != PACK_MAGIC:
+            self.close(); raise ValueError(f"{path} no es un archivo pack completo.")
+        index_at, self.count, meta_len = PACK_FOOTER.unpack(self._mm[-tail:-len(PACK_MAGIC)])
+        self._index_at = index_at
+        self.names = json.loads(self._mm[index_at + 16 * self.count:index_at + 16 * self.count + meta_len])["names"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        if i < 0: i += self.count
+        if not 0 <= i < self.count: raise IndexError(i)
+        off, size = struct.unpack_from("<QQ", self._mm, self._index_at + 16 * i)
+        return self._mm[off:off + size]
+
+    def get(self, n: int) -> bytes:
+        return self[n - 1]
+
+    def close(self):
+        self._mm.close(); self._f.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *_exc): self.close()
+
+PROGRESS_LINE_RE = re.compile(r"^[a-z0-9_]+=")
+
+def extract_to_sink(cmd: list[str], imgfmt: str, sink: str, path: Path, prefix: str, on_progress=None,
+                    log=lambda _t: None, interval: float = PROGRESS_INTERVAL, job: JobController | None = None) -> tuple[int, int]:
+    """Ejecuta cmd (que termina en "-f image2pipe pipe:1") y guarda cada imagen en el archivo sink según
+    llega, como <prefix>_000001.<ext>... El progreso va por stderr (-progress pipe:2) porque stdout lleva
+    las imágenes. Devuelve (código como run_ffmpeg, frames escritos)."""
+    if job is not None and job.cancelled.is_set(): return CANCELLED_RC, 0
+    cmd = [cmd[0], "-progress", "pipe:2", "-nostats", *cmd[1:]]
+    p = subprocess.Popen(cmd, stdin=subprocess.PIPE if job is not None else subprocess.DEVNULL,
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if job is not None and not job.register(p):
+        p.kill(); p.wait(); return CANCELLED_RC, 0
+
+    def pump_stderr():
+        stats, last = {}, 0.0
+        for raw in p.stderr:
+            line = raw.decode("utf-8", "replace")
+            if not PROGRESS_LINE_RE.match(line):
+                log(line); continue
+            k, _, v = line.strip().partition("=")
+            if k != "progress":
+                stats[k] = v; continue
+            if on_progress is not None and (v == "end" or time.monotonic() - last >= interval):
+                on_progress(parse_progress(stats, v)); last = time.monotonic()
+
+    t = threading.Thread(target=pump_stderr, daemon=True); t.start()
+    ext = EXT_MAP.get(imgfmt, imgfmt)
+    out = SINK_CLASSES[sink](path)
+    n, rc = 0, 1
+    try:
+        for img in split_images(p.stdout, imgfmt):
+            n += 1
+            out.add(f"{prefix}_{n:06d}.{ext}", img)
+        rc = p.wait()
+    finally:
+        if p.poll() is None:
+            p.kill(); p.wait()
+        out.close(); t.join()
+        if job is not None: job.unregister(p)
+    if job is not None and job.cancelled.is_set(): return CANCELLED_RC, n
+    return rc, n
+
+# === Lote: muchos videos con un pool acotado ===
+VIDEO_EXTS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".m4v", ".mpg", ".mpeg", ".ts", ".mts", ".wmv", ".flv"}
+
+def collect_inputs(spec: str) -> list[tuple[Path, str | None, str | None]]:
+    """(video, inicio, final) a partir de una carpeta, un glob o un archivo manifiesto.
+
+    El manifiesto tiene una ruta por línea, opcionalmente `ruta,inicio,final`; las líneas vacías
+    y las que empiezan por # se ignoran. Las rutas relativas son relativas al manifiesto."""
+    p = Path(spec)
+    if p.is_dir():
+        return [(f, None, None) for f in sorted(p.iterdir()) if f.is_file() and f.suffix.lower() in VIDEO_EXTS]
+    if p.is_file() and p.suffix.lower() not in VIDEO_EXTS:
+        items = []
+        for line in p.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"): continue
+            path, *bounds = [x.strip() for x in line.split(",")]
+            f = Path(path) if Path(path).is_absolute() else p.parent / path
+            items.append((f, (bounds[0] or None) if len(bounds) > 0 else None, (bounds[1] or None) if len(bounds) > 1 else None))
+        return items
+    if p.is_file():
+        return [(p, None, None)]
+    return [(Path(f), None, None) for f in sorted(glob.glob(spec, recursive=True)) if Path(f).is_file()]
+
+def batch_extract(items: list[tuple[Path, str | None, str | None]], outdir: Path, jobs: int = 2, start: str | float = 0.0,
+                  end: str | float | None = None, log=lambda _t: None, job: JobController | None = None, **opts) -> list[dict]:
+    """Ejecuta extract_frames sobre varios videos, como mucho `jobs` a la vez.
+    Cada video escribe en outdir/<nombre del video>/; start/end del manifiesto tienen prioridad."""
+    outdir = Path(outdir)
+    names, targets = set(), []
+    for f, s, e in items:
+        name = f.stem
+        while name in names: name += "_"
+        names.add(name)
+        targets.append((f, s if s is not None else start, e if e is not None else end, outdir / name))
+
+    def one(target) -> dict:
+        f, s, e, d = target
+        try:
+            return extract_frames(f, s, e, d, log=lambda t: log(f"[{f.name}] {t}"), job=job, **opts)
+        except Exception as ex:
+            return {"input": str(f), "status": "error", "frames": 0, "seconds": 0.0, "cut": None, "error": str(ex)}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(one, targets))
+
+def format_summary(results: list[dict]) -> str:
+    lines = [f"{'estado':<10}{'frames':>8}{'seg':>10}  video"]
+    for r in results:
+        lines.append(f"{r['status']:<10}{r['frames']:>8}{r['seconds']:>10.2f}  {r['input']}" + (f" [{r['range']}]" if r.get("range") else "")
+                     + (f"  ({r['error']})" if r.get("error") else ""))
+    ok = sum(1 for r in results if r["status"] == "ok")
+    lines.append(f"{ok}/{len(results)} videos OK")
+    return "\n".join(lines)
+
+# === Varios rangos de un mismo video (lista escrita, CSV o EDL) ===
+RANGE_LAYOUTS = ("carpeta", "prefijo")  # cada rango en outdir/<nombre>/ o como outdir/<prefijo>_<nombre>_000001...
+RANGE_RE = re.compile(r"^(?:(?P<name>[^=]+?)\s*=\s*)?(?P<s>[\d:.]+)\s*-\s*(?P<e>[\d:.]+)$")
+EDL_TC_RE = re.compile(r"\b(\d{2}):(\d{2}):(\d{2})([:;.,])(\d{2})\b")  # ";" (o "." / ",") = drop-frame
+
+def _range_name(name: str | None) -> str | None:
+    """Nombre apto para carpeta/prefijo (None si queda vacío)."""
+    return re.sub(r"[^\w.-]+", "_", name.strip()).strip("_") or None if name else None
+
+def _range(start_us: int, end_us: int, name: str | None = None) -> dict:
+    if end_us <= start_us:
+        raise ValueError(f"Rango inválido: el final ({us_to_arg(end_us)}) debe ser posterior al inicio ({us_to_arg(start_us)}).")
+    return {"name": _range_name(name), "start_us": start_us, "end_us": end_us}
+
+def parse_ranges(text: str) -> list[dict]:
+    """"intro=0-5, 00:01:00-00:01:05; 90.5-95" -> [{"name", "start_us", "end_us"}].
+    Rangos separados por comas, punto y coma o líneas; el nombre (opcional) va delante con "="."""
+    ranges = []
+    for item in re.split(r"[,;\n]", text):
+        item = item.strip()
+        if not item or item.startswith("#"): continue
+        m = RANGE_RE.match(item)
+        if not m: raise ValueError(f"Rango no válido: «{item}» (usa inicio-final o nombre=inicio-final)")
+        ranges.append(_range(to_us(m.group("s")), to_us(m.group("e")), m.group("name")))
+    return ranges
+
+def timecode_to_us(tc: str, fps: float) -> int:
+    """"HH:MM:SS:FF" -> µs desde 00:00:00:00 a `fps` reales (29.97 para 30000/1001).
+    Con ";" es drop-frame: cada minuto salvo los múltiplos de 10 se saltan las etiquetas de frame 00 y 01
+    (00 a 03 a 59.94), así que el número de frame se corrige antes de pasar a tiempo."""
+    m = EDL_TC_RE.fullmatch(tc.strip())
+    if not m: raise ValueError(f"Timecode no válido: «{tc}» (usa HH:MM:SS:FF)")
+    h, mi, sec, sep, ff = int(m[1]), int(m[2]), int(m[3]), m[4], int(m[5])
+    nominal = round(fps)
+    frames = ((h * 60 + mi) * 60 + sec) * nominal + ff
+    if sep != ":":
+        if nominal not in (30, 60):
+            raise ValueError(f"Timecode drop-frame «{tc}» con {fps:g} fps: solo existe a 29.97 o 59.94 fps.")
+        minutes = h * 60 + mi
+        frames -= nominal // 15 * (minutes - minutes // 10)
+    return seconds_to_us(frames / fps)
+
+def load_ranges(path: Path, fps: float | None = None, start_tc: str | None = None) -> list[dict]:
+    """Rangos desde un CSV (inicio,final[,nombre], con o sin cabecera) o un EDL CMX3600 (.edl).
+    Del EDL se usan el source in/out de cada evento y el nombre de la línea "* FROM CLIP NAME:" si la hay.
+    Son timecodes del clip (HH:MM:SS:FF, necesitan los fps del video): se les resta start_tc, el timecode
+    del primer frame del archivo (ffprobe_timecode; los EDL suelen empezar en 01:00:00:00). Sin él se
+    supone que el archivo empieza en 00:00:00:00."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8-sig", errors="replace")
+    if path.suffix.lower() != ".edl":
+        ranges = []
+        for i, row in enumerate(csv.reader(io.StringIO(text))):
+            row = [c.strip() for c in row]
+            if not row or not row[0] or row[0].startswith("#"): continue
+            try:
+                s_us, e_us = to_us(row[0]), to_us(row[1])
+            except (ValueError, IndexError):
+                if i == 0: continue  # cabecera
+                raise ValueError(f"{path.name}, línea {i + 1}: se esperaba inicio,final[,nombre]")
+            ranges.append(_range(s_us, e_us, row[2] if len(row) > 2 else None))
+        return ranges
+    if not fps:
+        raise ValueError("Para leer un EDL hacen falta los fps del video.")
+    offset = timecode_to_us(start_tc, fps) if start_tc else 0
+    ranges = []
+    for line in text.splitlines():
+        if line.lstrip().startswith("*") and "FROM CLIP NAME:" in line.upper() and ranges:
+            ranges[-1]["name"] = ranges[-1]["name"] or _range_name(line.split(":", 1)[1])
+            continue
+        if not line[:1].isdigit(): continue  # TITLE, FCM, comentarios
+        tcs = [m.group(0) for m in EDL_TC_RE.finditer(line)]
+        if len(tcs) < 4: continue
+        s_us, e_us = timecode_to_us(tcs[0], fps) - offset, timecode_to_us(tcs[1], fps) - offset
+        if s_us < 0:
+            raise ValueError(f"{path.name}: el evento {tcs[0]}-{tcs[1]} empieza antes del timecode inicial del video "
+                             f"({start_tc or '00:00:00:00'}); indica el timecode inicial correcto.")
+        ranges.append(_range(s_us, e_us))
+    return ranges
+
+def merge_ranges(ranges: list[dict]) -> list[dict]:
+    """Ordena por inicio y junta los rangos que se solapan o se tocan (nombre: los de todos con "+").
+    Los que siguen sin nombre se llaman r001, r002... por orden en el video."""
+    merged = []
+    for r in sorted(ranges, key=lambda r: (r["start_us"], r["end_us"])):
+        if merged and r["start_us"] <= merged[-1]["end_us"]:
+            last = merged[-1]
+            last["end_us"] = max(last["end_us"], r["end_us"])
+            last["names"].append(r["name"])
+        else:
+            merged.append(dict(r, names=[r["name"]]))
+    for i, r in enumerate(merged, start=1):
+        names = r.pop("names")
+        r["name"] = "+".join(n for n in names if n) or f"r{i:03d}"
+    return merged
+
+def extract_ranges(inp: Path, ranges: list[dict], outdir: Path = Path(DEFAULT_OUTDIR), prefix: str = "frame",
+                   layout: str = "carpeta", jobs: int = 2, cut: Path | None = None, log=lambda _t: None, on_progress=None,
+                   job: JobController | None = None, **opts) -> dict:
+    """Extrae varios rangos de un mismo video como un solo trabajo planificado.
+
+    Los rangos se ordenan y se juntan los solapados; el plan (duración, keyframe de cada inicio) sale de
+    un único probe compartido, y después se extraen hasta `jobs` rangos a la vez, cada uno con su propio
+    seek por keyframe. layout "carpeta" escribe cada rango en outdir/<nombre>/ y "prefijo" en outdir
+    como <prefijo>_<nombre>_000001... Con cut, cada rango genera además <cut>_<nombre>.mp4.
+    opts son las opciones de extract_frames. on_progress("Rangos", stats) suma el avance de todos.
+    Devuelve input, status, frames, seconds, ranges (un resultado de extract_frames por rango) y error."""
+    inp, outdir = Path(inp), Path(outdir)
+    if layout not in RANGE_LAYOUTS:
+        raise ValueError(f"Organización inválida. Opciones: {', '.join(RANGE_LAYOUTS)}")
+    if not ranges:
+        raise ValueError("No hay rangos que extraer.")
+    t_start = time.perf_counter()
+    result = {"input": str(inp), "status": "error", "frames": 0, "seconds": 0.0, "ranges": [], "error": None}
+    duration = ffprobe_duration_seconds(inp)  # un probe para todos (y queda en la caché)
+    if duration is None:
+        result["error"] = "No se pudo leer la duración del video."; log(f"[ERROR] {result['error']}\n"); return result
+    plan = []
+    for r in merge_ranges(ranges):
+        e_us = min(r["end_us"], seconds_to_us(duration))
+        if r["start_us"] >= e_us:
+            log(f"[INFO] Rango {r['name']} fuera del video ({seconds_to_hhmmss_ms(duration)}); se omite.\n"); continue
+        if opts.get("fast_seek", True): keyframe_before(inp, r["start_us"])  # en orden: un escaneo por zona, no por worker
+        plan.append(dict(r, end_us=e_us))
+    if not plan:
+        result["error"] = "Ningún rango cae dentro del video."; log(f"[ERROR] {result['error']}\n"); return result
+    total_s = sum(r["end_us"] - r["start_us"] for r in plan) / 1_000_000
+    log(f"[INFO] {len(plan)} rangos ({len(ranges)} pedidos, solapados juntos), {seconds_to_hhmmss_ms(total_s)} en total\n")
+
+    progress = {}
+    def range_progress(name: str):
+        if on_progress is None: return None
+        def cb(_stage: str, st: dict):
+            progress[name] = (st.get("out_time") or 0.0, st.get("frame") or 0)
+            on_progress("Rangos", dict(st, out_time=sum(t for t, _ in progress.values()),
+                                       frame=sum(f for _, f in progress.values())))
+        return cb
+
+    def one(r: dict) -> dict:
+        name = r["name"]
+        dest, pre = (outdir / name, prefix) if layout == "carpeta" else (outdir, f"{prefix}_{name}")
+        rcut = Path(cut).with_name(f"{Path(cut).stem}_{name}{Path(cut).suffix or '.mp4'}") if cut else None
+        try:
+            res = extract_frames(inp, r["start_us"] / 1_000_000, r["end_us"] / 1_000_000, dest, prefix=pre, cut=rcut,
+                                 log=lambda t: log(f"[{name}] {t}"), on_progress=range_progress(name), job=job, **opts)
+        except Exception as ex:
+            res = {"input": str(inp), "status": "error", "frames": 0, "seconds": 0.0, "cut": None, "error": str(ex)}
+        res["range"] = name
+        return res
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        result["ranges"] = list(pool.map(one, plan))
+    result["frames"] = sum(r["frames"] for r in result["ranges"])
+    result["seconds"] = round(time.perf_counter() - t_start, 3)
+    if job is not None and job.cancelled.is_set(): result["status"] = "cancelled"
+    elif all(r["status"] == "ok" for r in result["ranges"]): result["status"] = "ok"
+    else: result["error"] = next(r["error"] for r in result["ranges"] if r["status"] != "ok")
+    log(f"[{'✅' if result['status'] == 'ok' else 'INFO'}] Rangos: {result['frames']} frames en {result['seconds']:.2f} s\n")
+    return result
+
+# === CLI ===
+def _add_job_options(p: argparse.ArgumentParser):
+    p.add_argument("--start", default="0", help="inicio (HH:MM:SS.mmm o segundos, por defecto 0)")
+    p.add_argument("--end", default=None, help="final (por defecto, el final del video)")
+    p.add_argument("--fmt", default="png", choices=SUPPORTED_FORMATS, help="formato de imagen")
+    p.add_argument("--quality", type=int, default=2, help="calidad 2–31 para jpg/webp (2 = mejor)")
+    p.add_argument("--prefix", default="frame")
+    p.add_argument("--pts", action="store_true", help="usar PTS en los nombres de archivo")
+    p.add_argument("--cut-mode", default="exacto", choices=CUT_MODES)
+
+def _add_extract_options(p: argparse.ArgumentParser):
+    _add_job_options(p)
+    p.add_argument("--no-fast-seek", dest="fast_seek", action="store_false", help="decodificar desde el principio (sin seek por keyframes)")
+    p.add_argument("--workers", type=int, default=1, help="procesos FFmpeg en paralelo por video")
+    p.add_argument("--sample", default="todos", choices=SAMPLE_MODES,
+                   help="qué frames guardar: todos, cada-n (uno de cada N), fps (fps fijos), keyframes, escena (cambios de escena)")
+    p.add_argument("--sample-value", type=float, default=None,
+                   help="N para cada-n, fps para fps, umbral 0–1 para escena (por defecto 10 / 1 / 0.3)")
+    p.add_argument("--profile", default="equilibrado", choices=PROFILES + ("auto",),
+                   help="perfil de rendimiento: rápido, equilibrado, compacto o auto (mide y elige en esta máquina)")
+    p.add_argument("--threads", type=int, default=None, help="hilos de decodificación/filtros por proceso FFmpeg")
+    p.add_argument("--dedup", default="no", choices=DEDUP_MODES,
+                   help="no guardar frames repetidos: mpdecimate (FFmpeg) o phash (hash perceptual); deja <prefijo>_index.tsv")
+    p.add_argument("--dedup-threshold", type=int, default=DEDUP_THRESHOLD,
+                   help=f"phash: bits distintos (0–{DHASH_BITS}) para considerar dos frames iguales (por defecto {DEDUP_THRESHOLD}; 0 = mismo hash)")
+    p.add_argument("--sink", default="carpeta", choices=SINKS,
+                   help="carpeta (archivos sueltos) o un único archivo <prefijo>.tar/.zip/.vtfpack en --outdir")
+    p.add_argument("--scale", default=None, metavar="ESCALA", help="reducir los frames al decodificar: 320, 640x360 o 50%%")
+    p.add_argument("--also", action="append", default=[], metavar="FMT[:CALIDAD][@ESCALA]",
+                   help="frame set extra de la misma decodificación, p. ej. jpg:5@320 o webp@50%% (repetible)")
+    p.add_argument("--estimate", action="store_true", help="solo mostrar cuántos frames se generarían")
+    p.add_argument("--keep-partial", action="store_true", help="conservar la salida parcial si se cancela")
+    p.add_argument("--json", action="store_true", help="imprimir el resultado como JSON")
+
+def _cli_progress(stage: str, st: dict):
+    parts = [f"{stage}:"]
+    if st.get("out_time") is not None: parts.append(seconds_to_hhmmss_ms(st["out_time"]))
+    if st.get("frame") is not None: parts.append(f"frame {st['frame']}")
+    if st.get("fps"): parts.append(f"{st['fps']:.0f} fps")
+    if st.get("speed"): parts.append(f"{st['speed']:.2f}x")
+    sys.stderr.write("\r" + " ".join(parts) + "\033[K"); sys.stderr.flush()
+
+def _queue_main(queue, args) -> int:
+    if args.qcmd == "add":
+        try:
+            job_id = queue.add(args.input, args.start, args.end, args.outdir, prefix=args.prefix, imgfmt=args.fmt,
+                               quality=args.quality, use_pts=args.pts, cut=args.cut, cut_mode=args.cut_mode,
+                               profile=args.profile)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr); return 2
+        print(f"Trabajo {job_id} añadido a {queue.path}"); return 0
+    if args.qcmd == "list":
+        print(f"{'id':>4}  {'estado':<9}{'segmentos':>10}{'frames':>8}  video")
+        for j in queue.jobs():
+            print(f"{j['id']:>4}  {j['status']:<9}{str(j['segs_done']) + '/' + str(j['segs']):>10}{j['frames']:>8}  {j['input']}"
+                  + (f"  ({j['error']})" if j["error"] else ""))
+        return 0
+    if args.qcmd == "clear":
+        print(f"{queue.clear_done()} trabajos terminados eliminados de la cola"); return 0
+    if args.qcmd == "retry":
+        queue.retry(args.id); return 0
+    job = JobController()
+    log = lambda t: (sys.stderr.write(t), sys.stderr.flush())
+    try:
+        results = queue.drain(workers=args.workers, log=log, on_progress=_cli_progress, job=job)
+    except KeyboardInterrupt:
+        job.cancel()
+        print("\nCancelado; los trabajos pendientes se reanudarán con `queue run`.", file=sys.stderr); return 130
+    sys.stderr.write("\n")
+    print(format_summary(results))
+    return 0 if all(r["status"] == "ok" for r in results) else 1
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="frame_engine.py", description="VideoToFrame sin interfaz gráfica")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("extract", help="extraer frames (y opcionalmente recortar) de un video")
+    p.add_argument("input", type=Path)
+    p.add_argument("--outdir", type=Path, default=Path(DEFAULT_OUTDIR))
+    p.add_argument("--cut", type=Path, default=None, help="generar además un MP4 recortado en esta ruta")
+    _add_extract_options(p)
+    p.add_argument("--ranges", default=None, metavar="RANGOS",
+                   help="varios rangos en un trabajo: \"intro=0-5, 00:01:00-00:01:05\" (sustituye a --start/--end)")
+    p.add_argument("--ranges-file", type=Path, default=None, help="rangos desde un CSV (inicio,final[,nombre]) o un EDL")
+    p.add_argument("--edl-start", default=None, metavar="TC",
+                   help="timecode del primer frame del video para el EDL (por defecto el del archivo, o 00:00:00:00)")
+    p.add_argument("--range-layout", default="carpeta", choices=RANGE_LAYOUTS,
+                   help="cada rango en una subcarpeta o con su nombre en el prefijo")
+    p.add_argument("--range-jobs", type=int, default=2, help="rangos extraídos a la vez")
+    p = sub.add_parser("batch", help="procesar muchos videos (carpeta, glob o manifiesto)")
+    p.add_argument("spec", help="carpeta, glob (entre comillas) o archivo con una ruta por línea")
+    p.add_argument("--outdir", type=Path, default=Path(DEFAULT_OUTDIR), help="carpeta raíz; cada video va a una subcarpeta")
+    p.add_argument("--jobs", type=int, default=2, help="videos procesados a la vez")
+    _add_extract_options(p)
+    p = sub.add_parser("queue", help="cola persistente de trabajos (se reanuda tras un corte)")
+    qsub = p.add_subparsers(dest="qcmd", required=True)
+    q = qsub.add_parser("add", help="añadir un trabajo a la cola")
+    q.add_argument("input", type=Path)
+    q.add_argument("--outdir", type=Path, default=Path(DEFAULT_OUTDIR))
+    q.add_argument("--cut", type=Path, default=None)
+    q.add_argument("--profile", default="equilibrado", choices=PROFILES + ("auto",))
+    _add_job_options(q)
+    q = qsub.add_parser("run", help="procesar los trabajos pendientes")
+    q.add_argument("--workers", type=int, default=1, help="procesos FFmpeg en paralelo por trabajo")
+    qsub.add_parser("list", help="ver los trabajos y su avance")
+    qsub.add_parser("clear", help="borrar de la cola los trabajos terminados")
+    q = qsub.add_parser("retry", help="volver a poner en cola un trabajo con error")
+    q.add_argument("id", type=int)
+    for q in qsub.choices.values():
+        q.add_argument("--db", default=None, help="archivo SQLite de la cola")
+    p = sub.add_parser("preview", help="miniaturas u hojas de contactos rápidas de un tramo")
+    p.add_argument("input", type=Path)
+    p.add_argument("--start", default="0"); p.add_argument("--end", default=None)
+    p.add_argument("--outdir", type=Path, default=Path(DEFAULT_OUTDIR) / "preview")
+    p.add_argument("--count", type=int, default=20, help="miniaturas repartidas por el tramo")
+    p.add_argument("--width", type=int, default=320, help="ancho de cada miniatura en px")
+    p.add_argument("--sheet", action="store_true", help="juntarlas en hojas de contactos")
+    p.add_argument("--cols", type=int, default=5); p.add_argument("--rows", type=int, default=4)
+    p.add_argument("--fmt", default="jpg", choices=SUPPORTED_FORMATS)
+    p.add_argument("--quality", type=int, default=4)
+    p.add_argument("--prefix", default="preview")
+    p = sub.add_parser("tune", help="auto-ajuste: medir perfiles e hilos en esta máquina")
+    p.add_argument("input", type=Path)
+    p.add_argument("--start", default="0")
+    p.add_argument("--fmt", default="png", choices=SUPPORTED_FORMATS)
+    p.add_argument("--quality", type=int, default=2)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--seconds", type=float, default=2.0, help="duración del tramo de prueba")
+    p = sub.add_parser("bench", help="banco de pruebas: clip sintético, todos los caminos, informe JSON")
+    p.add_argument("--clip", type=Path, default=None, help="usar este video en lugar de generar uno con testsrc2")
+    p.add_argument("--size", default="1280x720"); p.add_argument("--rate", type=int, default=25)
+    p.add_argument("--duration", type=float, default=20.0); p.add_argument("--gop", type=int, default=50)
+    p.add_argument("--formats", default="png,jpg,webp,bmp", help="formatos separados por comas")
+    p.add_argument("--max-workers", type=int, default=None)
+    p.add_argument("--out", type=Path, default=None, help="guardar el informe aquí además de imprimirlo")
+    p = sub.add_parser("bench-workers", help="medir frames/s con 1..N workers")
+    p.add_argument("input", type=Path)
+    p.add_argument("--start", default="0"); p.add_argument("--end", required=True)
+    p.add_argument("--max-workers", type=int, default=None)
+    p.add_argument("--fmt", default="png", choices=SUPPORTED_FORMATS)
+    args = ap.parse_args(argv)
+
+    if not have("ffmpeg") or not have("ffprobe"):
+        print("Se requieren ffmpeg y ffprobe en el PATH.", file=sys.stderr); return 1
+    if args.cmd == "queue":
+        from job_queue import JobQueue  # solo aquí: el motor no depende de la cola
+        return _queue_main(JobQueue(args.db) if args.db else JobQueue(), args)
+    if args.cmd == "tune":
+        res = autotune(args.input, to_us(args.start), args.fmt, args.quality, args.workers, args.seconds, force=True)
+        for row in res["results"]:
+            print(json.dumps(row, ensure_ascii=False))
+        print(f"Mejor: perfil {res['profile']}, {res['threads']} hilos ({res['fps']} frames/s) — guardado en {TUNE_PATH}")
+        return 0
+    if args.cmd == "preview":
+        try:
+            res = make_previews(args.input, args.start, args.end, args.outdir, args.count, args.width, args.sheet,
+                                args.cols, args.rows, args.prefix, args.fmt, args.quality,
+                                log=lambda t: (sys.stderr.write(t), sys.stderr.flush()))
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr); return 2
+        print(json.dumps(res, ensure_ascii=False))
+        return 0 if res["status"] == "ok" else 1
+    if args.cmd == "bench":
+        from benchmark import run_suite  # solo aquí, como la cola
+        formats = tuple(f.strip().lower() for f in args.formats.split(",") if f.strip())
+        if any(f not in SUPPORTED_FORMATS for f in formats):
+            print(f"ERROR: Formatos soportados: {', '.join(SUPPORTED_FORMATS)}", file=sys.stderr); return 2
+        report = run_suite(args.clip, args.size, args.rate, args.duration, args.gop, formats, args.max_workers,
+                           log=lambda t: (sys.stderr.write(t), sys.stderr.flush()))
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if args.out: args.out.write_text(text + "\n", encoding="utf-8")
+        print(text)
+        return 0 if all(c["rc"] == 0 for c in report["cases"]) else 1
+    if args.cmd == "bench-workers":
+        for row in benchmark_workers(args.input, to_us(args.start), to_us(args.end), args.fmt, args.max_workers):
+            print(json.dumps(row))
+        return 0
+
+    job = JobController()
+    log = lambda t: (sys.stderr.write(t), sys.stderr.flush())
+    opts = dict(prefix=args.prefix, imgfmt=args.fmt, quality=args.quality, use_pts=args.pts, fast_seek=args.fast_seek,
+                workers=args.workers, cut_mode=args.cut_mode, sample=args.sample, sample_val=args.sample_value,
+                profile=args.profile, threads=args.threads, scale=args.scale, dedup=args.dedup,
+                dedup_threshold=args.dedup_threshold, sink=args.sink, keep_partial=args.keep_partial)
+    try:
+        opts["outputs"] = [parse_output_spec(spec) for spec in args.also]
+        if args.estimate:
+            items = [(args.input, None, None)] if args.cmd == "extract" else collect_inputs(args.spec)
+            val = sample_value(args.sample, args.sample_value)
+            total = 0
+            for path, s, e in items:
+                s_us = to_us(s or args.start)
+                e = e or args.end
+                e_us = to_us(e) if e is not None else seconds_to_us(ffprobe_duration_seconds(path) or 0.0)
+                est = estimate_frames(path, s_us, e_us, args.sample, val) if e_us > s_us else 0
+                print(f"{'?' if est is None else est:>8}  {path}")
+                total = None if est is None or total is None else total + est
+            if len(items) > 1: print(f"{'?' if total is None else total:>8}  total")
+            return 0
+        if args.cmd == "extract" and (args.ranges or args.ranges_file):
+            ranges = parse_ranges(args.ranges) if args.ranges else []
+            if args.ranges_file:
+                start_tc = args.edl_start or ffprobe_timecode(args.input)
+                if args.ranges_file.suffix.lower() == ".edl": log(f"[INFO] EDL: timecode inicial del video {start_tc or '00:00:00:00'}\n")
+                ranges += load_ranges(args.ranges_file, (ffprobe_video_stream(args.input) or {}).get("fps"), start_tc)
+            res = extract_ranges(args.input, ranges, args.outdir, layout=args.range_layout, jobs=args.range_jobs, cut=args.cut,
+                                 log=log, on_progress=None if args.json else _cli_progress, job=job, **opts)
+            sys.stderr.write("\n")
+            print(json.dumps(res, ensure_ascii=False) if args.json else format_summary(res["ranges"]))
+            return {"ok": 0, "cancelled": 130}.get(res["status"], 1)
+        if args.cmd == "extract":
+            res = extract_frames(args.input, args.start, args.end, args.outdir, cut=args.cut, log=log,
+                                 on_progress=None if args.json else _cli_progress, job=job, **opts)
+            sys.stderr.write("\n")
+            print(json.dumps(res, ensure_ascii=False) if args.json else format_summary([res]))
+            return {"ok": 0, "cancelled": 130}.get(res["status"], 1)
+        items = collect_inputs(args.spec)
+        if not items:
+            print(f"No se encontraron videos en {args.spec}", file=sys.stderr); return 1
+        results = batch_extract(items, args.outdir, jobs=args.jobs, start=args.start, end=args.end, log=log, job=job, **opts)
+        print(json.dumps(results, ensure_ascii=False, indent=2) if args.json else format_summary(results))
+        if job.cancelled.is_set(): return 130
+        return 0 if all(r["status"] == "ok" for r in results) else 1
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr); return 2
+    except KeyboardInterrupt:
+        job.cancel()
+        print("\nCancelado.", file=sys.stderr); return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
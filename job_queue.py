@@ -0,0 +1,234 @@
+"""Cola persistente de trabajos de extracción (SQLite) con reanudación tras un corte.
+
+Cada trabajo se divide en segmentos que empiezan en keyframes; la base de datos guarda qué
+segmentos están terminados y cuántos frames tiene cada uno. Si el proceso muere, al volver a
+procesar la cola solo se repiten los segmentos que estaban a medias.
+"""
+import json, os, shutil, sqlite3, threading, time, math
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from frame_engine import (DEFAULT_OUTDIR, CANCELLED_RC, CUT_MODES, SUPPORTED_FORMATS, QUALITY_FORMATS, EXT_MAP, PROFILES,
+                          JobController, run_ffmpeg, ffprobe_duration_seconds, keyframe_before, snap_range,
+                          plan_segments, segment_cmd, merge_segments, image_encoder_args, smart_cut, cut_exact_cmd, to_us, seconds_to_us,
+                          autotune)
+
+QUEUE_DB = str(Path(DEFAULT_OUTDIR).resolve().parent / "videotoframe_jobs.sqlite3")  # junto a DEFAULT_OUTDIR
+SEGMENT_SECONDS = 30.0  # duración objetivo de cada segmento: lo máximo que se repite al reanudar
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    input     TEXT NOT NULL,
+    start_us  INTEGER NOT NULL,
+    end_us    INTEGER NOT NULL,
+    outdir    TEXT NOT NULL,
+    options   TEXT NOT NULL,
+    status    TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | error
+    cut_done  INTEGER NOT NULL DEFAULT 0,
+    frames    INTEGER NOT NULL DEFAULT 0,
+    error     TEXT,
+    created   REAL NOT NULL,
+    updated   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id    INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx       INTEGER NOT NULL,
+    seek_us   INTEGER NOT NULL,
+    start_us  INTEGER NOT NULL,
+    end_us    INTEGER NOT NULL,
+    done      INTEGER NOT NULL DEFAULT 0,
+    frames    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+class JobQueue:
+    """Cola de trabajos en disco. Se puede usar desde varios threads (una conexión con lock)."""
+    def __init__(self, path: str | Path = QUEUE_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            self._db.executescript(SCHEMA)
+
+    def _exec(self, sql: str, args: tuple = ()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def _update(self, job_id: int, **fields):
+        cols = ", ".join(f"{k}=?" for k in fields)
+        self._exec(f"UPDATE jobs SET {cols}, updated=? WHERE id=?", (*fields.values(), time.time(), job_id))
+
+    # === Gestión de la cola ===
+    def add(self, inp: Path, start: str | float = 0.0, end: str | float | None = None, outdir: Path = Path(DEFAULT_OUTDIR),
+            prefix: str = "frame", imgfmt: str = "png", quality: int = 2, use_pts: bool = False,
+            cut: Path | None = None, cut_mode: str = "exacto", profile: str = "equilibrado") -> int:
+        """Añade un trabajo y devuelve su id. Valida las opciones igual que extract_frames."""
+        inp, imgfmt = Path(inp).resolve(), imgfmt.lower()
+        if imgfmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato inválido. Formatos soportados: {', '.join(SUPPORTED_FORMATS)}")
+        if imgfmt in QUALITY_FORMATS and not (2 <= quality <= 31):
+            raise ValueError("La calidad debe ser un entero entre 2 y 31.")
+        if cut is not None and cut_mode not in CUT_MODES:
+            raise ValueError(f"Modo de recorte inválido. Modos: {', '.join(CUT_MODES)}")
+        if profile not in PROFILES + ("auto",):
+            raise ValueError(f"Perfil inválido. Perfiles: {', '.join(PROFILES)}, auto")
+        if not inp.exists():
+            raise ValueError(f"El archivo de entrada no existe: {inp}")
+        s_us = to_us(start)
+        if end is None:
+            secs = ffprobe_duration_seconds(inp)
+            if secs is None: raise ValueError(f"No se pudo leer la duración de {inp}")
+            e_us = seconds_to_us(secs)
+        else:
+            e_us = to_us(end)
+        if e_us <= s_us:
+            raise ValueError("El final debe ser posterior al inicio.")
+        opts = dict(prefix=prefix, imgfmt=imgfmt, quality=quality, use_pts=use_pts,
+                    cut=str(Path(cut).resolve()) if cut is not None else None, cut_mode=cut_mode, profile=profile)
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute("INSERT INTO jobs (input, start_us, end_us, outdir, options, created, updated) VALUES (?,?,?,?,?,?,?)",
+                                   (str(inp), s_us, e_us, str(Path(outdir).resolve()), json.dumps(opts), now, now))
+            return cur.lastrowid
+
+    def jobs(self) -> list[dict]:
+        """Trabajos con su avance (segmentos hechos / total)."""
+        rows = self._exec("""SELECT j.*, COUNT(s.idx) AS segs, COALESCE(SUM(s.done), 0) AS segs_done
+                             FROM jobs j LEFT JOIN segments s ON s.job_id = j.id GROUP BY j.id ORDER BY j.id""")
+        return [dict(r, options=json.loads(r["options"])) for r in rows]
+
+    def pending(self) -> list[int]:
+        # 'running' también: es un trabajo que se quedó a medias (el proceso murió)
+        return [r["id"] for r in self._exec("SELECT id FROM jobs WHERE status IN ('pending','running') ORDER BY id")]
+
+    def retry(self, job_id: int):
+        self._update(job_id, status="pending", error=None)
+
+    def remove(self, job_id: int):
+        self._exec("DELETE FROM jobs WHERE id=?", (job_id,))
+
+    def clear_done(self) -> int:
+        n = len(self._exec("SELECT id FROM jobs WHERE status='done'"))
+        self._exec("DELETE FROM jobs WHERE status='done'")
+        return n
+
+    # === Ejecución ===
+    def _plan(self, job_id: int, inp: Path, s_us: int, e_us: int) -> list[sqlite3.Row]:
+        """Segmentos del trabajo; se planifican una sola vez y quedan fijos para poder reanudar.
+        El rango se ajusta a la rejilla de frames (snap_range): el primer segmento empieza en el primer frame."""
+        segs = self._exec("SELECT * FROM segments WHERE job_id=? ORDER BY idx", (job_id,))
+        if segs: return segs
+        s_us, e_us = snap_range(inp, s_us, e_us)
+        n = max(1, math.ceil((e_us - s_us) / 1_000_000 / SEGMENT_SECONDS))
+        planned = plan_segments(inp, s_us, e_us, n)
+        if not planned:
+            k = keyframe_before(inp, s_us)
+            planned = [(k or 0, s_us, e_us)]
+        with self._lock:
+            self._db.executemany("INSERT INTO segments (job_id, idx, seek_us, start_us, end_us) VALUES (?,?,?,?,?)",
+                                 [(job_id, i, *seg) for i, seg in enumerate(planned)])
+        return self._exec("SELECT * FROM segments WHERE job_id=? ORDER BY idx", (job_id,))
+
+    def run_job(self, job_id: int, workers: int = 1, log=lambda _t: None, on_progress=None,
+                job: JobController | None = None) -> dict:
+        """Procesa (o reanuda) un trabajo. Un trabajo cancelado queda pendiente para reanudarlo luego."""
+        row = self._exec("SELECT * FROM jobs WHERE id=?", (job_id,))[0]
+        opts = json.loads(row["options"])
+        inp, outdir = Path(row["input"]), Path(row["outdir"])
+        s_us, e_us = row["start_us"], row["end_us"]
+        result = {"id": job_id, "input": str(inp), "status": "error", "frames": 0, "seconds": 0.0, "error": None}
+        t_start = time.perf_counter()
+        def finish(status: str, error: str | None = None, **fields) -> dict:
+            self._update(job_id, status=status if status != "cancelled" else "pending", error=error, **fields)
+            result.update(status="ok" if status == "done" else status, error=error, seconds=round(time.perf_counter() - t_start, 3))
+            if error: log(f"[ERROR] {error}\n")
+            return result
+
+        if not inp.exists():
+            return finish("error", "El archivo de entrada no existe.")
+        outdir.mkdir(parents=True, exist_ok=True)
+        self._update(job_id, status="running")
+        stage_progress = (lambda stage: (lambda st: on_progress(stage, st))) if on_progress else (lambda _stage: None)
+        profile, threads = opts.get("profile", "equilibrado"), max(1, (os.cpu_count() or 1) // workers)
+        if profile == "auto":
+            tuned = autotune(inp, s_us, opts["imgfmt"], opts["quality"], workers, log=log)
+            profile, threads = tuned["profile"], tuned["threads"] or threads
+
+        # 1) Recorte (se repite entero si se interrumpió)
+        if opts.get("cut") and not row["cut_done"]:
+            cut = Path(opts["cut"])
+            log(f"[INFO] Cortando fragmento de video (modo {opts['cut_mode']})…\n")
+            if opts["cut_mode"] == "rápido":
+                rc, _out = smart_cut(inp, s_us, e_us, cut, log=log, on_progress=stage_progress("Recorte"), job=job, profile=profile)
+            else:
+                rc, _out = run_ffmpeg(cut_exact_cmd(inp, s_us, e_us, cut, profile=profile), on_progress=stage_progress("Recorte"), on_log=log, job=job)
+            if rc == CANCELLED_RC:
+                cut.unlink(missing_ok=True)
+                return finish("cancelled")
+            if rc != 0:
+                return finish("error", "Falló el recorte.")
+            self._update(job_id, cut_done=1)
+            log(f"[OK] Recorte: {cut}\n")
+
+        # 2) Frames por segmentos; los ya terminados se saltan
+        segs = self._plan(job_id, inp, s_us, e_us)
+        todo = [seg for seg in segs if not seg["done"]]
+        if len(todo) < len(segs):
+            log(f"[INFO] Reanudando: {len(segs) - len(todo)}/{len(segs)} segmentos ya estaban hechos\n")
+        ext = EXT_MAP.get(opts["imgfmt"], opts["imgfmt"])
+        enc_args = image_encoder_args(opts["imgfmt"], opts["quality"], profile)
+        partsdir = outdir / f".{opts['prefix']}_job{job_id}"
+        base_s = sum(seg["end_us"] - seg["start_us"] for seg in segs if seg["done"]) / 1_000_000
+        seg_done_s, lock = {}, threading.Lock()
+
+        def seg_progress(idx: int, st: dict):
+            with lock:
+                seg_done_s[idx] = st["out_time"] or 0.0
+                total = dict(st, out_time=base_s + sum(seg_done_s.values()))
+            stage_progress("Frames")(total)
+
+        def run_segment(seg: sqlite3.Row) -> int:
+            d = partsdir / f"seg{seg['idx']:05d}"
+            shutil.rmtree(d, ignore_errors=True)  # lo que quedó de un intento interrumpido
+            d.mkdir(parents=True)
+            cmd = segment_cmd(inp, (seg["seek_us"], seg["start_us"], seg["end_us"]), segs[0]["start_us"], d, opts["prefix"], ext,
+                              enc_args, opts["use_pts"], threads)
+            rc, _out = run_ffmpeg(cmd, on_progress=(lambda st: seg_progress(seg["idx"], st)) if on_progress else None,
+                                  on_log=log, job=job)
+            if rc == 0:
+                self._exec("UPDATE segments SET done=1, frames=? WHERE job_id=? AND idx=?",
+                           (sum(1 for _ in d.iterdir()), job_id, seg["idx"]))
+            return rc
+
+        log(f"[INFO] Extrayendo {len(todo)} segmentos con {workers} workers…\n")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            rcs = list(pool.map(run_segment, todo))
+        if job is not None and job.cancelled.is_set():
+            log("[INFO] Trabajo cancelado; queda pendiente y se reanudará desde el último segmento completo.\n")
+            return finish("cancelled")
+        if any(rc != 0 for rc in rcs):
+            return finish("error", "Falló la extracción de algún segmento.")
+
+        # 3) Unir: renombrado idempotente, se puede repetir si se corta a mitad
+        segs = self._exec("SELECT * FROM segments WHERE job_id=? ORDER BY idx", (job_id,))
+        frames = merge_segments([partsdir / f"seg{seg['idx']:05d}" for seg in segs], [seg["frames"] for seg in segs],
+                                outdir, opts["prefix"], ext, opts["use_pts"])
+        shutil.rmtree(partsdir, ignore_errors=True)
+        log(f"[✅] Trabajo {job_id}: {frames} frames en {outdir}\n")
+        result["frames"] = frames
+        return finish("done", frames=frames)
+
+    def drain(self, workers: int = 1, log=lambda _t: None, on_progress=None, job: JobController | None = None) -> list[dict]:
+        """Procesa todos los trabajos pendientes (y los que quedaron a medias) en orden."""
+        results = []
+        for job_id in self.pending():
+            if job is not None and job.cancelled.is_set(): break
+            log(f"[INFO] Trabajo {job_id}…\n")
+            results.append(self.run_job(job_id, workers=workers, log=log, on_progress=on_progress, job=job))
+        return results
@@ -0,0 +1,13 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import frame_engine  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def probe_cache_en_memoria(monkeypatch):
+    """Cada test con su propia caché de ffprobe, sin leer ni escribir la del usuario."""
+    monkeypatch.setattr(frame_engine, "PROBE_CACHE", frame_engine.ProbeCache(path=None))
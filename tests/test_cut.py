@@ -0,0 +1,82 @@
+"""Recorte a MP4: todos los caminos (misma pasada que los frames, exacto aparte, smart cut) llevan los mismos streams,
+y el smart cut con extremos fuera de keyframes conserva frames, duración y sincronía con el audio."""
+import re
+import subprocess
+
+import pytest
+
+from frame_engine import extract_frames, have, smart_cut
+
+pytestmark = pytest.mark.skipif(not (have("ffmpeg") and have("ffprobe")), reason="requiere ffmpeg y ffprobe en el PATH")
+
+RATE, GOP = 25, 48  # keyframe cada 1.92 s
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    """Video con dos pistas de audio: la primera mono y la segunda estéreo (la que FFmpeg elegiría por defecto)."""
+    path = tmp_path_factory.mktemp("clip") / "dos_audios.mp4"
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i", f"testsrc2=size=320x240:rate={RATE}:duration=8",
+                    "-f","lavfi","-i","sine=frequency=440:sample_rate=48000:duration=8",
+                    "-f","lavfi","-i","sine=frequency=880:sample_rate=48000:duration=8",
+                    "-filter_complex","[2:a]aformat=channel_layouts=stereo[st]", "-map","0:v","-map","1:a","-map","[st]",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p","-g",str(GOP),"-keyint_min",str(GOP),"-sc_threshold","0",
+                    "-c:a","aac", str(path)], check=True)
+    return path
+
+@pytest.fixture(scope="module")
+def mpegts(tmp_path_factory) -> bool:
+    """El smart cut escribe y vuelve a leer sus partes en MPEG-TS; algunas builds estáticas fallan al leerlo."""
+    ts = tmp_path_factory.mktemp("ts") / "prueba.ts"
+    ok = subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i","testsrc2=size=64x64:duration=0.2",
+                         "-c:v","libx264","-f","mpegts", str(ts)]).returncode == 0
+    return ok and subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-i", str(ts), "-f","null","-"]).returncode == 0
+
+def streams(path) -> list[str]:
+    """Tipo de cada stream ("Video", o "Audio mono"/"Audio stereo") según `ffmpeg -i`."""
+    err = subprocess.run(["ffmpeg","-hide_banner","-i", str(path)], capture_output=True, text=True).stderr
+    return [m.group(1) + (f" {m.group(2)}" if m.group(2) else "")
+            for m in re.finditer(r"Stream #\d+:\d+\S*: (Video|Audio):(?:.*?Hz, (mono|stereo))?", err)]
+
+@pytest.mark.parametrize("opts", [dict(workers=1), dict(workers=2), dict(workers=2, cut_mode="rápido")],
+                         ids=["misma-pasada", "exacto", "rápido"])
+def test_recorte_mismos_streams(clip, mpegts, tmp_path, opts):
+    if opts.get("cut_mode") == "rápido" and not mpegts: pytest.skip("este FFmpeg no lee MPEG-TS")
+    cut = tmp_path / "recorte.mp4"
+    r = extract_frames(clip, 2.5, 6.5, tmp_path / "frames", imgfmt="bmp", cut=cut, **opts)
+    assert r["status"] == "ok" and r["cut"] == str(cut)
+    assert streams(cut) == ["Video", "Audio mono"]
+
+@pytest.fixture(scope="module")
+def destellos(tmp_path_factory):
+    """Negro con un destello blanco y un pitido de 1 kHz durante los primeros 40 ms de cada segundo."""
+    path = tmp_path_factory.mktemp("sync") / "destellos.mp4"
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i", f"color=black:size=160x120:rate={RATE}:duration=8",
+                    "-f","lavfi","-i","aevalsrc='if(lt(mod(t,1),0.04),sin(2*PI*1000*t),0)':sample_rate=48000:duration=8",
+                    "-vf","drawbox=color=white:thickness=fill:enable='lt(mod(t,1),0.04)'",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p","-g",str(GOP),"-keyint_min",str(GOP),"-sc_threshold","0",
+                    "-c:a","aac", str(path)], check=True)
+    return path
+
+def destellos_y_pitidos(path) -> tuple[list[float], list[float]]:
+    """Tiempos de los frames blancos y de los comienzos de pitido."""
+    err = subprocess.run(["ffmpeg","-hide_banner","-i", str(path), "-vf","signalstats,metadata=print:key=lavfi.signalstats.YAVG",
+                          "-af","silencedetect=noise=-30dB:duration=0.02","-f","null","-"], capture_output=True, text=True).stderr
+    flashes, t = [], None
+    for line in err.splitlines():
+        if m := re.search(r"pts_time:(\S+)", line): t = float(m.group(1))
+        if (m := re.search(r"YAVG=([\d.]+)", line)) and float(m.group(1)) > 100: flashes.append(t)
+    return flashes, [float(x) for x in re.findall(r"silence_end: (\S+)", err)]
+
+def test_smart_cut_gop_parciales(destellos, mpegts, tmp_path):
+    if not mpegts: pytest.skip("este FFmpeg no lee MPEG-TS")
+    cut, logs = tmp_path / "recorte.mp4", []
+    rc, _out = smart_cut(destellos, 2_500_000, 6_500_000, cut, log=logs.append)  # keyframes en 1.92, 3.84 y 5.76
+    assert rc == 0 and any("GOP parciales recodificados" in t for t in logs)
+    md5 = subprocess.run(["ffmpeg","-hide_banner","-i", str(cut), "-map","0:v","-f","framemd5","-"], capture_output=True, text=True).stdout
+    assert sum(1 for line in md5.splitlines() if not line.startswith("#")) == 100  # los frames en [2.52, 6.52)
+    dur = subprocess.run(["ffprobe","-v","error","-select_streams","v:0","-show_entries","stream=duration","-of","csv=p=0", str(cut)],
+                         capture_output=True, text=True).stdout
+    assert float(dur) == pytest.approx(4.0, abs=0.05)
+    flashes, beeps = destellos_y_pitidos(cut)
+    assert flashes == pytest.approx([0.48, 1.48, 2.48, 3.48], abs=0.005)
+    assert beeps[:len(flashes)] == pytest.approx(flashes, abs=0.03)
@@ -0,0 +1,31 @@
+"""phash: frames lisos de distinto color no son repetidos; los iguales sí."""
+import subprocess
+
+import pytest
+
+from frame_engine import DEDUP_THRESHOLD, DHASH_H, DHASH_W, dhash, extract_frames, have
+
+COLORES = ["white", "black", "red", "blue"]
+
+def liso(rgb) -> bytes:
+    return bytes(rgb) * (DHASH_W * DHASH_H)
+
+def distancia(a: bytes, b: bytes) -> int:
+    return bin(dhash(a) ^ dhash(b)).count("1")
+
+def test_hash_frames_lisos():
+    blanco, negro, rojo, azul = liso((255, 255, 255)), liso((0, 0, 0)), liso((255, 0, 0)), liso((0, 0, 255))
+    assert distancia(blanco, negro) > DEDUP_THRESHOLD
+    assert distancia(rojo, azul) > DEDUP_THRESHOLD  # misma luminancia, distinto color
+    assert distancia(negro, liso((3, 3, 3))) <= DEDUP_THRESHOLD
+
+@pytest.mark.skipif(not have("ffmpeg"), reason="requiere ffmpeg en el PATH")
+def test_dedup_colores_lisos(tmp_path):
+    clip = tmp_path / "colores.mp4"
+    inputs = [a for c in COLORES for a in ("-f", "lavfi", "-i", f"color=c={c}:s=160x120:r=10:d=0.5")]
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y", *inputs, "-filter_complex",
+                    "".join(f"[{i}:v]" for i in range(len(COLORES))) + f"concat=n={len(COLORES)}:v=1",
+                    "-c:v","libx264","-pix_fmt","yuv420p", str(clip)], check=True)
+    r = extract_frames(clip, 0, 2.0, tmp_path / "out", imgfmt="png", dedup="phash")
+    assert r["status"] == "ok"
+    assert r["frames"] == len(COLORES)
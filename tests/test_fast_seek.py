@@ -0,0 +1,71 @@
+"""El seek rápido por keyframes debe dar exactamente los mismos frames (y nombres -frame_pts) que el lento."""
+import json
+import subprocess
+
+import pytest
+
+import frame_engine
+from frame_engine import ProbeCache, estimate_frames, have, keyframe_before, seconds_to_us, seek_args
+
+pytestmark = pytest.mark.skipif(not (have("ffmpeg") and have("ffprobe")), reason="requiere ffmpeg y ffprobe en el PATH")
+
+RATE, GOP = 25, 48  # keyframe cada 1.92 s
+START_TIME = 10.0   # start_time del clip remuxado, como en las capturas TS/M2TS/MTS
+
+@pytest.fixture(scope="module")
+def mp4(tmp_path_factory):
+    path = tmp_path_factory.mktemp("clip") / "testsrc.mp4"
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i", f"testsrc2=size=320x240:rate={RATE}:duration=8",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p","-g",str(GOP),"-keyint_min",str(GOP),"-sc_threshold","0",
+                    str(path)], check=True)
+    return path
+
+@pytest.fixture(scope="module")
+def desplazado(mp4):
+    """El mismo clip remuxado para que no empiece en 0."""
+    path = mp4.with_name("desplazado.mkv")
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-i", str(mp4), "-c","copy",
+                    "-output_ts_offset", str(START_TIME), str(path)], check=True)
+    return path
+
+@pytest.fixture(params=["mp4", "desplazado"])
+def clip(request):
+    return request.getfixturevalue(request.param)
+
+def framemd5(clip, pre, post) -> list[str]:
+    out = subprocess.run(["ffmpeg","-hide_banner","-loglevel","error", *pre, "-i", str(clip), *post, "-map","0:v:0","-vsync","0",
+                          "-f","framemd5","-"], capture_output=True, text=True, check=True).stdout
+    return [line.rsplit(",", 1)[1].strip() for line in out.splitlines() if line and not line.startswith("#")]
+
+def pts_names(clip, pre, post, outdir) -> list[str]:
+    outdir.mkdir()
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error", *pre, "-i", str(clip), *post, "-vsync","0","-frame_pts","1",
+                    str(outdir / "frame_%d.bmp")], check=True)
+    return sorted(p.name for p in outdir.iterdir())
+
+@pytest.mark.parametrize("start,end", [(3.0, 4.5), (2.5, 2.6), (5.76, 7.0)])
+def test_fast_seek_mismos_frames(clip, tmp_path, start, end):
+    s_us, e_us = seconds_to_us(start), seconds_to_us(end)
+    fast_pre, fast_post, k = seek_args(clip, s_us, e_us, fast=True)
+    slow_pre, slow_post, none = seek_args(clip, s_us, e_us, fast=False)
+    assert none is None
+    assert k is not None and 0 < k <= s_us and k % seconds_to_us(GOP / RATE) == 0
+
+    fast = framemd5(clip, fast_pre, fast_post)
+    assert fast and fast == framemd5(clip, slow_pre, slow_post)
+    assert pts_names(clip, fast_pre, fast_post, tmp_path / "fast") == pts_names(clip, slow_pre, slow_post, tmp_path / "slow")
+
+def test_keyframes_con_start_time(mp4, desplazado):
+    for t in (0.5, 2.5, 4.0, 7.9):
+        assert keyframe_before(desplazado, seconds_to_us(t)) == keyframe_before(mp4, seconds_to_us(t))
+    s_us, e_us = seconds_to_us(1.0), seconds_to_us(7.0)
+    assert estimate_frames(desplazado, s_us, e_us, "keyframes") == estimate_frames(mp4, s_us, e_us, "keyframes") == 3
+
+def test_cache_descarta_keyframes_de_version_anterior(mp4, desplazado, tmp_path, monkeypatch):
+    """Las entradas de la versión 3 pueden tener keyframes mal leídos (y el intervalo marcado como escaneado): no se reutilizan."""
+    cache_path = tmp_path / "probe.json"
+    vieja = dict(frame_engine._probe(desplazado), v=3, keyframes=[0, 123_000], scanned=[[0, 8_000_000]])
+    cache_path.write_text(json.dumps({ProbeCache.key(desplazado): vieja}))
+    monkeypatch.setattr(frame_engine, "PROBE_CACHE", ProbeCache(path=cache_path))
+    assert keyframe_before(desplazado, seconds_to_us(2.5)) == keyframe_before(mp4, seconds_to_us(2.5)) == seconds_to_us(GOP / RATE)
+    assert frame_engine.PROBE_CACHE.known_keyframe(desplazado, seconds_to_us(2.5)) == seconds_to_us(GOP / RATE)
@@ -0,0 +1,10 @@
+"""Importar el motor (CLI, nodos sin pantalla) no debe cargar módulos pesados que solo usan algunas funciones."""
+import subprocess
+import sys
+from pathlib import Path
+
+def test_import_sin_numpy_ni_tkinter():
+    code = "import sys, frame_engine; print(sorted(m for m in ('numpy', 'tkinter') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,37 @@
+"""cancel() pide a cada proceso que termine por stdin, sea el pipe de texto o binario."""
+import subprocess
+import sys
+import time
+
+import pytest
+
+from frame_engine import JobController
+
+# lee una línea por stdin y sale, como FFmpeg con 'q'
+CHILD = [sys.executable, "-c", "import sys, time; sys.stdin.readline(); sys.exit(0)"]
+
+@pytest.mark.parametrize("text", [True, False])
+def test_cancel_pide_salir_por_stdin(text):
+    job = JobController(grace=5.0)
+    p = subprocess.Popen(CHILD, stdin=subprocess.PIPE, text=text)
+    assert job.register(p)
+    t0 = time.monotonic()
+    job.cancel()
+    assert p.wait(timeout=5.0) == 0  # salió por la 'q', no por terminate()
+    assert time.monotonic() - t0 < 2.0
+
+def test_cancel_sin_quit_no_escribe_en_stdin():
+    job = JobController(grace=0.2)
+    p = subprocess.Popen(CHILD, stdin=subprocess.PIPE)
+    job.register(p, quit=False)
+    job.cancel()
+    assert p.wait(timeout=5.0) != 0  # no recibió nada: lo paró terminate()
+
+def test_register_tras_cancel():
+    job = JobController()
+    job.cancel()
+    p = subprocess.Popen(CHILD, stdin=subprocess.PIPE)
+    try:
+        assert not job.register(p)
+    finally:
+        p.kill(); p.wait()
@@ -0,0 +1,52 @@
+"""Con 1..N workers (y en la cola con reanudación) deben salir los mismos frames con los mismos nombres,
+también cuando el inicio no cae justo en un frame."""
+import hashlib
+import subprocess
+
+import pytest
+
+import job_queue
+from frame_engine import extract_frames, have
+from job_queue import JobQueue
+
+pytestmark = pytest.mark.skipif(not (have("ffmpeg") and have("ffprobe")), reason="requiere ffmpeg y ffprobe en el PATH")
+
+RATE, GOP = 25, 48  # keyframe cada 1.92 s
+RANGES = [(0.52, 6.04), (1.92, 5.76), (0.5, 6.3), (0.51, 6.0), (0.75, 7.1)]  # alineados a frames y no alineados
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    path = tmp_path_factory.mktemp("clip") / "testsrc.mp4"
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i", f"testsrc2=size=320x240:rate={RATE}:duration=8",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p","-g",str(GOP),"-keyint_min",str(GOP),"-sc_threshold","0",
+                    str(path)], check=True)
+    return path
+
+def frames(outdir) -> dict[str, str]:
+    return {f.name: hashlib.md5(f.read_bytes()).hexdigest() for f in outdir.iterdir()}
+
+@pytest.mark.parametrize("use_pts", [False, True])
+@pytest.mark.parametrize("start,end", RANGES)
+def test_workers_mismos_frames(clip, tmp_path, start, end, use_pts):
+    ref = None
+    for workers in (1, 2, 3, 4):
+        out = tmp_path / f"w{workers}"
+        r = extract_frames(clip, start, end, out, imgfmt="bmp", use_pts=use_pts, workers=workers)
+        assert r["status"] == "ok"
+        got = frames(out)
+        if ref is None:
+            ref = got
+            # justo los frames con pts en [start, end)
+            first = -(-round(start * 1_000_000) // 40_000)
+            assert len(ref) == -(-round(end * 1_000_000) // 40_000) - first
+        assert got == ref, f"{workers} workers"
+
+@pytest.mark.parametrize("use_pts", [False, True])
+@pytest.mark.parametrize("start,end", RANGES[2:])
+def test_cola_mismos_frames(clip, tmp_path, monkeypatch, start, end, use_pts):
+    monkeypatch.setattr(job_queue, "SEGMENT_SECONDS", 1.5)
+    extract_frames(clip, start, end, tmp_path / "ref", imgfmt="bmp", use_pts=use_pts)
+    q = JobQueue(tmp_path / "cola.sqlite3")
+    job_id = q.add(clip, start, end, tmp_path / "cola", imgfmt="bmp", use_pts=use_pts)
+    assert q.run_job(job_id, workers=3)["status"] == "ok"
+    assert frames(tmp_path / "cola") == frames(tmp_path / "ref")
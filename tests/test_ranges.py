@@ -0,0 +1,74 @@
+"""Timecodes de EDL (drop-frame y timecode inicial del archivo), rangos escritos a mano y rangos que comparten carpeta."""
+import subprocess
+import threading
+
+import pytest
+
+from frame_engine import JobController, extract_ranges, have, load_ranges, merge_ranges, parse_ranges, timecode_to_us
+
+NTSC = 30000 / 1001
+
+def frames(us: int, fps: float) -> int:
+    return round(us / 1_000_000 * fps)
+
+@pytest.mark.parametrize("tc,n", [("00:00:59;29", 1799), ("00:01:00;02", 1800), ("00:10:00;00", 17982),
+                                  ("01:00:00;00", 107892), ("00:01:00:00", 1800)])
+def test_timecode_2997(tc, n):
+    assert frames(timecode_to_us(tc, NTSC), NTSC) == n
+
+def test_timecode_5994_drop_frame():
+    assert frames(timecode_to_us("00:01:00;04", 2 * NTSC), 2 * NTSC) == 3600
+
+def test_timecode_entero():
+    assert timecode_to_us("01:00:01:12", 25.0) == 3601_480_000
+
+def test_drop_frame_a_25_fps():
+    with pytest.raises(ValueError):
+        timecode_to_us("00:00:01;00", 25.0)
+
+EDL = """TITLE: CORTES
+FCM: DROP FRAME
+
+001  AX       V     C        01:00:10;00 01:00:12;00 00:00:00;00 00:00:02;00
+* FROM CLIP NAME: plano uno
+002  AX       V     C        01:01:00;02 01:01:05;00 00:00:02;00 00:00:06;28
+"""
+
+def test_edl_resta_el_timecode_inicial(tmp_path):
+    path = tmp_path / "cortes.edl"
+    path.write_text(EDL)
+    r1, r2 = load_ranges(path, NTSC, "01:00:00;00")
+    assert r1["name"] == "plano_uno" and r2["name"] is None
+    assert frames(r1["start_us"], NTSC) == 300 and frames(r1["end_us"], NTSC) == 360
+    assert frames(r2["start_us"], NTSC) == 1800  # 01:01:00;02 es el primer frame del minuto 1
+    assert frames(load_ranges(path, NTSC)[0]["start_us"], NTSC) == 107892 + 300  # sin timecode inicial: desde 00:00:00;00
+    with pytest.raises(ValueError):  # eventos anteriores al primer frame del archivo
+        load_ranges(path, NTSC, "02:00:00;00")
+
+def test_parse_y_merge():
+    ranges = merge_ranges(parse_ranges("a=1-2, 1.5-3; 10-11\nb=00:00:20-00:00:21"))
+    assert [(r["name"], r["start_us"], r["end_us"]) for r in ranges] == [
+        ("a", 1_000_000, 3_000_000), ("r002", 10_000_000, 11_000_000), ("b", 20_000_000, 21_000_000)]
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "testsrc.mp4"
+    subprocess.run(["ffmpeg","-hide_banner","-loglevel","error","-y","-f","lavfi","-i","testsrc2=size=160x120:rate=25:duration=4",
+                    "-c:v","libx264","-preset","veryfast","-pix_fmt","yuv420p", str(path)], check=True)
+    return path
+
+@pytest.mark.skipif(not (have("ffmpeg") and have("ffprobe")), reason="requiere ffmpeg y ffprobe en el PATH")
+def test_prefijos_anidados(clip, tmp_path):
+    """En la misma carpeta, el rango "a" no cuenta (ni borra al cancelar) los frames de "a_b"."""
+    out = tmp_path / "out"
+    r = extract_ranges(clip, parse_ranges("a_b=0-1, a=2-3"), out, layout="prefijo", jobs=1, imgfmt="bmp")
+    assert r["status"] == "ok" and [x["frames"] for x in r["ranges"]] == [25, 25]
+
+    # "a" se cancela cuando "a_b" ya ha escrito sus frames (después de que "a" mirase la carpeta)
+    out2, job, a_b_done = tmp_path / "out2", JobController(), threading.Event()
+    def log(line: str):
+        if line.startswith("[a_b] [✅]"): a_b_done.set()
+        if line.startswith("[a] [INFO] Extrayendo frames"):
+            a_b_done.wait(30); job.cancel()
+    extract_ranges(clip, parse_ranges("a_b=0-1, a=2-3"), out2, layout="prefijo", jobs=2, imgfmt="bmp", log=log, job=job)
+    assert sorted(f.name for f in out2.iterdir()) == [f"frame_a_b_{i:06d}.bmp" for i in range(1, 26)]
@@ -0,0 +1,82 @@
+"""split_images y el formato pack, con flujos sintéticos (no hace falta FFmpeg)."""
+import io
+import struct
+import zlib
+
+import pytest
+
+from frame_engine import PACK_MAGIC, PackReader, PackSink, split_images
+
+def png(size: int, seed: int) -> bytes:
+    """PNG con el IDAT partido en trozos de 4 KiB, como los escribe FFmpeg."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    data = bytes((seed + i) % 251 for i in range(size))
+    idat = b"".join(chunk(b"IDAT", data[i:i + 4096]) for i in range(0, len(data), 4096))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", bytes(13)) + idat + chunk(b"IEND", b"")
+
+def jpg(size: int, seed: int) -> bytes:
+    """SOI, APP0, SOS y datos con 0xFF escapados (0xFF00) hasta EOI."""
+    scan = bytes((seed + i) % 255 for i in range(size)).replace(b"\xfe", b"\xff\x00")
+    return b"\xff\xd8" + b"\xff\xe0\x00\x10" + bytes(14) + b"\xff\xda\x00\x08" + bytes(6) + scan + b"\xff\xd9"
+
+def bmp(size: int, seed: int) -> bytes:
+    body = bytes((seed + i) % 256 for i in range(size))
+    return b"BM" + struct.pack("<I", 14 + size) + bytes(8) + body
+
+def webp(size: int, seed: int) -> bytes:
+    body = b"WEBPVP8 " + struct.pack("<I", size) + bytes((seed + i) % 256 for i in range(size))
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+class Trickle(io.RawIOBase):
+    """Entrega los datos en trozos pequeños e irregulares, como un pipe."""
+    def __init__(self, data: bytes):
+        self.data, self.pos, self.step = data, 0, 0
+
+    def readable(self): return True
+
+    def readinto(self, b):
+        self.step = self.step % 7 + 1
+        n = min(len(b), 997 * self.step, len(self.data) - self.pos)
+        b[:n] = self.data[self.pos:self.pos + n]; self.pos += n
+        return n
+
+@pytest.mark.parametrize("fmt,make", [("png", png), ("jpg", jpg), ("jpeg", jpg), ("bmp", bmp), ("webp", webp)])
+def test_split_images(fmt, make):
+    imgs = [make(size, seed) for seed, size in enumerate((0, 1, 5000, 70_000, 300))]
+    assert list(split_images(Trickle(b"".join(imgs)), fmt)) == imgs
+
+def test_split_images_corta_la_imagen_incompleta():
+    imgs = [png(9000, 1), png(9000, 2)]
+    stream = b"".join(imgs)
+    assert list(split_images(io.BytesIO(stream[:-100]), "png")) == imgs[:1]
+
+def test_split_images_formato_no_soportado():
+    with pytest.raises(ValueError):
+        list(split_images(io.BytesIO(b"II*\x00"), "tiff"))
+
+def test_pack_ida_y_vuelta(tmp_path):
+    path = tmp_path / "frame.vtfpack"
+    frames = {f"frame_{n:06d}.png": png(1000 * n, n) for n in range(1, 6)}
+    sink = PackSink(path)
+    for name, data in frames.items(): sink.add(name, data)
+    sink.close()
+    with PackReader(path) as pack:
+        assert len(pack) == 5 and pack.names == list(frames)
+        assert [pack[i] for i in range(5)] == list(frames.values())
+        assert pack.get(3) == frames["frame_000003.png"] and pack[-1] == frames["frame_000005.png"]
+        with pytest.raises(IndexError): pack[5]
+
+def test_pack_vacio(tmp_path):
+    PackSink(tmp_path / "vacio.vtfpack").close()
+    with PackReader(tmp_path / "vacio.vtfpack") as pack:
+        assert len(pack) == 0 and pack.names == []
+
+def test_pack_incompleto(tmp_path):
+    path = tmp_path / "cortado.vtfpack"
+    sink = PackSink(path); sink.add("frame_000001.png", png(100, 0)); sink.f.close()  # sin índice ni pie
+    with pytest.raises(ValueError):
+        PackReader(path)
+    path.write_bytes(PACK_MAGIC[:4])
+    with pytest.raises(ValueError):
+        PackReader(path)